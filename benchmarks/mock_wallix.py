@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""Offline stand-in for the Wallix Bastion REST endpoints used by the collection.
+
+Serves users, user groups, devices (with their services, local domains and
+local domain accounts), target groups, authorizations and the global account
+listing, with offset/limit pagination, ``fields`` projection and simple
+``q=field=glob`` filters. Single objects carry an ETag and honour ``If-None-Match`` unless
+``--no-etags`` is given. Any credentials are accepted unless ``--password``
+is given. Latency, error injection and the dataset are configurable.
+
+Control endpoints, not part of the Wallix API:
+
+* ``POST /_reset``                     empty the dataset and the statistics
+* ``POST /_seed?count=N[&types=a,b]`` create N objects of every (or of these) type
+* ``GET  /_stats``                     requests served, by method
+"""
+
+import argparse
+import base64
+import fnmatch
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+COLLECTIONS = {
+    'users': 'user_name',
+    'usergroups': 'group_name',
+    'devices': 'device_name',
+    'targetgroups': 'group_name',
+    'authorizations': 'authorization_name',
+}
+
+# Lists of a device served as sub-collections: endpoint, field, key.
+DEVICE_LISTS = {
+    'services': ('services', 'service_name'),
+    'localdomains': ('local_domains', 'domain_name'),
+}
+
+SESSION_COOKIE = 'session'
+
+
+class Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.collections = {name: {} for name in COLLECTIONS}
+        self.accounts = {}
+        self.stats = {}
+
+    def seed(self, count, types=None):
+        types = types or list(COLLECTIONS) + ['accounts']
+        for i in range(count):
+            if 'users' in types:
+                self._add_user(i)
+            if 'usergroups' in types:
+                self.collections['usergroups'][f"group{i}"] = dict(group_name=f"group{i}", users=[f"user{i}"])
+            if 'devices' in types:
+                self._add_device(i)
+            if 'accounts' in types:
+                self.accounts[(f"device{i}", 'local')] = {
+                    'root': dict(account_name='root', account_login='root', checkout_policy='default',
+                                 device=f"device{i}", domain='local'),
+                }
+            if 'targetgroups' in types:
+                self.collections['targetgroups'][f"targets{i}"] = dict(
+                    group_name=f"targets{i}",
+                    session=dict(accounts=[dict(account='root', domain='local', device=f"device{i}", service='SSH')]),
+                )
+            if 'authorizations' in types:
+                self._add_authorization(i)
+
+    def _add_user(self, i):
+        self.collections['users'][f"user{i}"] = dict(
+            user_name=f"user{i}", profile='user', email=f"user{i}@example.com",
+            groups=[f"group{i}"], user_auths=['local_password'], force_change_pwd=False,
+        )
+
+    def _add_device(self, i):
+        self.collections['devices'][f"device{i}"] = dict(
+            device_name=f"device{i}", host=f"10.0.{i // 256}.{i % 256}",
+            local_domains=[dict(domain_name='local')], services=[dict(service_name='SSH', protocol='SSH', port=22)],
+            tags=[dict(key='env', value='bench')],
+        )
+
+    def _add_authorization(self, i):
+        self.collections['authorizations'][f"auth{i}"] = dict(
+            authorization_name=f"auth{i}", user_group=f"group{i}", target_group=f"targets{i}",
+            is_critical=False, is_recorded=False, authorize_password_retrieval=False,
+            authorize_sessions=True, authorize_session_sharing=False, approval_required=False,
+            subprotocols=['SSH_SHELL_SESSION'],
+        )
+
+
+def _select(items, query):
+    if 'q' in query:
+        field, _, pattern = query['q'][0].partition('=')
+        items = [item for item in items if fnmatch.fnmatch(str(item.get(field, '')), pattern)]
+    offset = int(query.get('offset', ['0'])[0])
+    limit = int(query.get('limit', [str(len(items))])[0])
+    items = items[offset:offset + limit]
+    if 'fields' in query:
+        fields = query['fields'][0].split(',')
+        items = [{k: v for k, v in item.items() if k in fields} for item in items]
+    return items
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one segment: separate small writes stall on
+    # Nagle and delayed ACKs and would add 40ms to streamed responses.
+    wbufsize = -1
+    store = None
+    options = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=None, headers=None):
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _authenticated(self):
+        cookie = self.headers.get('Cookie') or ''
+        if f"{SESSION_COOKIE}=bench" in cookie:
+            return True, {}
+        auth = self.headers.get('Authorization') or ''
+        credentials = base64.b64decode(auth[6:]).decode('utf-8', 'replace') if auth.startswith('Basic ') else ''
+        if credentials and self.options.password in (None, credentials.partition(':')[2]):
+            return True, {'Set-Cookie': f"{SESSION_COOKIE}=bench; Path=/"}
+        return False, {}
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        # Each segment decoded on its own, so an encoded slash stays in its name.
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        body = self._body()
+
+        if parts[0].startswith('_'):
+            return self._control(method, parts[0], query)
+
+        with self.store.lock:
+            self.store.stats[method] = self.store.stats.get(method, 0) + 1
+
+        if self.options.latency:
+            time.sleep(max(0, random.gauss(self.options.latency, self.options.latency / 10)) / 1000)
+        if self.options.error_rate and random.random() < self.options.error_rate:
+            return self._reply(503, dict(error='overloaded'), {'Retry-After': '0'})
+
+        ok, headers = self._authenticated()
+        if not ok:
+            return self._reply(401, dict(error='unauthorized', description='Authentication required'))
+        if parts[0] != 'api' or len(parts) < 2:
+            return self._reply(404, dict(error='not found', description=self.path))
+
+        with self.store.lock:
+            status, result = self._dispatch(method, parts[1:], query, body)
+        if status == 200 and isinstance(result, dict) and self.options.etags:
+            etag = '"%s"' % hashlib.sha1(json.dumps(result, sort_keys=True).encode('utf-8')).hexdigest()
+            headers = dict(headers, ETag=etag)
+            if self.headers.get('If-None-Match') == etag:
+                return self._reply(304, None, headers)
+        self._reply(status, result, headers)
+
+    def _dispatch(self, method, parts, query, body):
+        store = self.store
+        if parts[0] == 'accounts' and len(parts) == 1 and method == 'GET':
+            items = [account for accounts in store.accounts.values() for account in accounts.values()]
+            return 200, _select(items, query)
+
+        if parts[0] == 'devices' and len(parts) in (3, 4) and parts[2] in DEVICE_LISTS:
+            device = store.collections['devices'].get(parts[1])
+            if device is None:
+                return 404, dict(error='not found', description=f"Device {parts[1]} not found")
+            field, key = DEVICE_LISTS[parts[2]]
+            entries = {entry[key]: entry for entry in device.get(field) or []}
+            status, result = self._crud(method, entries, key, parts[3:], query, body)
+            device[field] = list(entries.values())
+            if field == 'local_domains' and method == 'DELETE' and status == 204:
+                store.accounts.pop((parts[1], parts[3]), None)
+            return status, result
+
+        if parts[0] == 'devices' and len(parts) >= 4 and parts[2] == 'localdomains' and parts[4:5] == ['accounts']:
+            device = store.collections['devices'].get(parts[1])
+            if device is None:
+                return 404, dict(error='not found', description=f"Device {parts[1]} not found")
+            accounts = store.accounts.setdefault((parts[1], parts[3]), {})
+            return self._crud(method, accounts, 'account_name', parts[5:], query, body,
+                              extra=dict(device=parts[1], domain=parts[3]))
+
+        if parts[0] not in COLLECTIONS:
+            return 404, dict(error='not found', description=parts[0])
+        return self._crud(method, store.collections[parts[0]], COLLECTIONS[parts[0]], parts[1:], query, body)
+
+    def _crud(self, method, collection, key, rest, query, body, extra=None):
+        if not rest:
+            if method == 'GET':
+                return 200, _select(list(collection.values()), query)
+            if method == 'POST':
+                if not body or key not in body:
+                    return 400, dict(error='bad request', description=f"Missing {key}")
+                if body[key] in collection:
+                    return 400, dict(error='conflict', description=f"{body[key]} already exists")
+                collection[body[key]] = dict(body, **(extra or {}))
+                return 204, None
+            return 405, dict(error='method not allowed', description=method)
+
+        obj = collection.get(rest[0])
+        if obj is None:
+            return 404, dict(error='not found', description=f"{rest[0]} not found")
+        if method == 'GET':
+            return 200, _select([obj], query)[0]
+        if method == 'PUT':
+            obj.update(body or {})
+            return 204, None
+        if method == 'DELETE':
+            del collection[rest[0]]
+            return 204, None
+        return 405, dict(error='method not allowed', description=method)
+
+    def _control(self, method, name, query):
+        with self.store.lock:
+            if name == '_reset' and method == 'POST':
+                self.store.reset()
+                return self._reply(204)
+            if name == '_seed' and method == 'POST':
+                types = query['types'][0].split(',') if 'types' in query else None
+                self.store.seed(int(query.get('count', ['0'])[0]), types)
+                return self._reply(204)
+            if name == '_stats' and method == 'GET':
+                return self._reply(200, dict(self.store.stats))
+        return self._reply(404, dict(error='not found'))
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+def make_server(host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, etags=True, password=None):
+    options = argparse.Namespace(latency=latency, error_rate=error_rate, etags=etags, password=password)
+    handler = type('BoundHandler', (Handler,), dict(store=Store(), options=options))
+    # A short listen backlog makes bursts of new connections wait for a SYN
+    # retransmit, a second late.
+    server_class = type('Server', (ThreadingHTTPServer,), dict(request_queue_size=128))
+    server = server_class((host, port), handler)
+    server.daemon_threads = True
+    # Clients dropping idle pooled connections is expected, not an error.
+    server.handle_error = lambda request, client_address: None
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="mean latency added to each request, in ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument('--dataset', type=int, default=0, help="objects of every type created at startup")
+    parser.add_argument('--no-etags', action='store_true', help="do not send ETag headers")
+    parser.add_argument('--password', help="only accept this password, instead of any")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.error_rate, not args.no_etags, args.password)
+    server.RequestHandlerClass.store.seed(args.dataset)
+    print(f"http://{server.server_address[0]}:{server.server_address[1]}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""Benchmark the collection request paths against the mock Wallix API.
+
+Each scenario runs in its own process against a fresh mock server dataset
+and reports the number of requests served, the wall-clock time, the p50 and
+p99 latency of each request and the peak RSS of the process. Results are
+compared with thresholds.json; the run fails when one is exceeded.
+
+Scenarios call the same module_utils functions as the modules do:
+``*_single`` runs one object per task (a new client each time, as one
+Ansible task per object would), ``*_bulk`` and ``state`` run the bulk paths,
+``state_plan_devices`` plans then applies device updates that take several
+writes per device.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+SIZES = (100, 1000, 10000)
+
+
+def _import_collection():
+    # Make the collection importable as ansible_collections.jphetphoumy.wallix
+    # whether or not the checkout lives in an ansible_collections tree.
+    parts = ROOT.split(os.sep)
+    if parts[-3:-2] == ['ansible_collections']:
+        sys.path.insert(0, os.sep.join(parts[:-3]))
+        return
+    base = tempfile.mkdtemp(prefix='wallix-bench-')
+    atexit.register(shutil.rmtree, base, ignore_errors=True)
+    os.makedirs(os.path.join(base, 'ansible_collections', 'jphetphoumy'))
+    os.symlink(ROOT, os.path.join(base, 'ansible_collections', 'jphetphoumy', 'wallix'))
+    sys.path.insert(0, base)
+
+
+def _params(options, **values):
+    params = {name: spec.get('default') for name, spec in options().items()}
+    params.update(values)
+    return params
+
+
+def desired_objects(size):
+    # Matches what mock_wallix.Store.seed() creates, so runs against a
+    # seeded server have nothing to change.
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_state import RESOURCES
+
+    def build(name, i):
+        options = RESOURCES[name]['options']
+        if name == 'users':
+            return _params(options, name=f"user{i}", profile='user', email=f"user{i}@example.com",
+                           groups=[f"group{i}"], user_auths=['local_password'])
+        if name == 'user_groups':
+            return _params(options, group_name=f"group{i}", users=[f"user{i}"])
+        if name == 'devices':
+            return _params(options, device_name=f"device{i}", host=f"10.0.{i // 256}.{i % 256}",
+                           local_domains=[dict(domain_name='local')],
+                           services=[dict(service_name='SSH', protocol='SSH', port=22)],
+                           tags=[dict(key='env', value='bench')])
+        if name == 'device_accounts':
+            return _params(options, account_name='root', account_login='root', device_id=f"device{i}", domain_id='local')
+        if name == 'target_groups':
+            return _params(options, group_name=f"targets{i}", session=dict(
+                accounts=[dict(account='root', domain='local', device=f"device{i}", service='SSH')]))
+        return _params(options, authorization_name=f"auth{i}", user_group=f"group{i}", target_group=f"targets{i}",
+                       authorize_sessions=True, subprotocols=['SSH_SHELL_SESSION'])
+
+    return {name: [build(name, i) for i in range(size)] for name in RESOURCES}
+
+
+def run_scenario(name, size, url, workers, page_size):
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_parallel
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixClient, WallixError
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_state import (
+        RESOURCES, apply_plan, apply_state, plan_state,
+    )
+
+    latencies = []
+    session_dir = tempfile.mkdtemp(prefix='wallix-bench-session-')
+    atexit.register(shutil.rmtree, session_dir, ignore_errors=True)
+
+    class TimedClient(WallixClient):
+        def _send(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super()._send(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+    def new_client(pool_size=10):
+        return TimedClient(url, 'bench', 'bench', pool_size=pool_size, session_cache_dir=session_dir, retry_backoff=0.01)
+
+    resource_name, mode, _ = SCENARIOS[name]
+    desired = desired_objects(size)
+    start = time.perf_counter()
+
+    if mode == 'state':
+        client = new_client(pool_size=workers)
+        _, failed = apply_state(client, desired, workers=workers, page_size=page_size)
+    elif mode == 'plan':
+        # Every device takes several writes, applied from a plan: the device
+        # itself, then an updated and a new service.
+        client = new_client(pool_size=workers)
+        services = [dict(service_name='SSH', protocol='SSH', port=2222), dict(service_name='RDP', protocol='RDP', port=3389)]
+        changed = {resource_name: [dict(item, description='planned', services=services) for item in desired[resource_name]]}
+        plan, _, failed = plan_state(client, changed, workers=workers, page_size=page_size)
+        if not failed:
+            _, failed = apply_plan(client, plan, workers=workers)
+    elif mode == 'info':
+        client = new_client()
+        failed = 0
+        for _ in client.iter_items("/api/devices", page_size=page_size):
+            pass
+    elif mode == 'single':
+        spec = RESOURCES[resource_name]
+        failed = 0
+        for item in desired[resource_name]:
+            client = new_client()
+            try:
+                spec['reconcile'](client, _get(resource_name, client, item), item)
+            except WallixError:
+                failed += 1
+            client.session.close()
+    else:
+        spec = RESOURCES[resource_name]
+        client = new_client(pool_size=workers)
+        existing = spec['list'](client, desired[resource_name], page_size)
+        outcomes = run_parallel(lambda item: spec['reconcile'](client, existing.get(spec['key'](item)), item),
+                                desired[resource_name], workers)
+        failed = sum(1 for _, error in outcomes if error)
+
+    wall = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return dict(
+        scenario=name, size=size, failed=failed, wall_s=round(wall, 3),
+        p50_ms=round(percentile(0.50), 3), p99_ms=round(percentile(0.99), 3),
+        peak_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    )
+
+
+def _get(resource_name, client, item):
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_authorizations import get_authorization
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_device_accounts import get_account
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_devices import get_device
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_target_groups import get_target_group
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_user_groups import get_group
+    from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_users import get_user
+
+    if resource_name == 'users':
+        return get_user(client, item['name'])
+    if resource_name == 'user_groups':
+        return get_group(client, item['group_name'])
+    if resource_name == 'devices':
+        return get_device(client, item['device_name'])
+    if resource_name == 'device_accounts':
+        return get_account(client, item['device_id'], item['domain_id'], item['account_name'])
+    if resource_name == 'target_groups':
+        return get_target_group(client, item['group_name'])
+    return get_authorization(client, item['authorization_name'])
+
+
+# Scenario name -> (resource type, mode, mock types seeded first). Seeding
+# every type means the run has nothing to change.
+ALL = 'users,usergroups,devices,accounts,targetgroups,authorizations'
+SCENARIOS = {
+    'users_single': ('users', 'single', None),
+    'users_single_noop': ('users', 'single', ALL),
+    'users_bulk': ('users', 'bulk', None),
+    'users_bulk_noop': ('users', 'bulk', ALL),
+    'user_groups_single': ('user_groups', 'single', None),
+    'devices_single': ('devices', 'single', None),
+    'device_accounts_single': ('device_accounts', 'single', 'devices'),
+    'device_accounts_single_noop': ('device_accounts', 'single', ALL),
+    'device_accounts_bulk': ('device_accounts', 'bulk', 'devices'),
+    'device_accounts_bulk_noop': ('device_accounts', 'bulk', ALL),
+    'target_groups_single': ('target_groups', 'single', None),
+    'authorizations_single': ('authorizations', 'single', None),
+    'authorizations_single_noop': ('authorizations', 'single', ALL),
+    'state': (None, 'state', None),
+    'state_noop': (None, 'state', ALL),
+    'state_plan_devices': ('devices', 'plan', 'devices'),
+    'info': (None, 'info', 'devices'),
+}
+
+
+def _control(url, method, path):
+    request = urllib.request.Request(f"{url}{path}", method=method, data=b'' if method == 'POST' else None)
+    with urllib.request.urlopen(request) as r:
+        body = r.read()
+    return json.loads(body) if body else None
+
+
+def _check(result, thresholds):
+    limits = thresholds.get(result['scenario'], {}).get(str(result['size']), {})
+    problems = []
+    if result['failed']:
+        problems.append(f"{result['failed']} failed operations")
+    for field, limit in limits.items():
+        value = result[field.replace('max_', '')]
+        if value > limit:
+            problems.append(f"{field.replace('max_', '')} {value} > {limit}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help="default: all")
+    parser.add_argument('--size', action='append', type=int, help=f"default: {', '.join(map(str, SIZES))}")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help="mean latency of the mock server, in ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests the mock answers 503")
+    parser.add_argument('--thresholds', default=os.path.join(HERE, 'thresholds.json'))
+    parser.add_argument('--no-check', action='store_true', help="report only, do not fail on thresholds")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    _import_collection()
+
+    if args.worker:
+        result = run_scenario(args.scenario[0], args.size[0], args.url, args.workers, args.page_size)
+        print(json.dumps(result))
+        return 0
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'mock_wallix.py'), '--port', '0',
+         '--latency', str(args.latency), '--error-rate', str(args.error_rate)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        url = server.stdout.readline().strip()
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+
+        results = []
+        failures = 0
+        header = f"{'scenario':<28}{'size':>7}{'requests':>10}{'wall_s':>9}{'p50_ms':>9}{'p99_ms':>9}{'rss_mb':>8}"
+        print(header)
+        for name in args.scenario or SCENARIOS:
+            for size in args.size or SIZES:
+                _control(url, 'POST', '/_reset')
+                if SCENARIOS[name][2]:
+                    _control(url, 'POST', f"/_seed?count={size}&types={SCENARIOS[name][2]}")
+                output = subprocess.run(
+                    [sys.executable, __file__, '--worker', '--scenario', name, '--size', str(size), '--url', url,
+                     '--workers', str(args.workers), '--page-size', str(args.page_size)],
+                    check=True, stdout=subprocess.PIPE, text=True,
+                ).stdout
+                result = json.loads(output)
+                result['requests'] = sum(_control(url, 'GET', '/_stats').values())
+                results.append(result)
+
+                problems = [] if args.no_check else _check(result, thresholds)
+                failures += bool(problems)
+                print(f"{name:<28}{size:>7}{result['requests']:>10}{result['wall_s']:>9}{result['p50_ms']:>9}"
+                      f"{result['p99_ms']:>9}{result['peak_rss_mb']:>8}"
+                      + (f"  REGRESSION: {'; '.join(problems)}" if problems else ''), flush=True)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
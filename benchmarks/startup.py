@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""Measure the AnsiballZ payload size and the run time of the modules.
+
+Each module is packaged the way ansible-playbook ships it to a target, then
+run repeatedly as a standalone process against the mock Wallix API, for a
+task that changes nothing. Reports the payload size and the median, min and
+max wall-clock time of a run, which is dominated by interpreter startup and
+imports.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from run import HERE, ROOT, _import_collection
+
+# A no-op task of each module against a server seeded with one object of
+# every type.
+MODULES = {
+    'wallix_user': dict(name='user0', profile='user', email='user0@example.com', groups=['group0'],
+                        user_auths=['local_password']),
+    'wallix_user_group': dict(group_name='group0', users=['user0']),
+    'wallix_device': dict(device_name='device0', host='10.0.0.0'),
+    'wallix_device_account': dict(device_id='device0', domain_id='local', account_name='root', account_login='root'),
+    'wallix_target_group': dict(group_name='targets0'),
+    'wallix_authorization': dict(authorization_name='auth0', user_group='group0', target_group='targets0',
+                                 authorize_sessions=True, subprotocols=['SSH_SHELL_SESSION']),
+    'wallix_info': dict(resource='devices'),
+}
+
+
+def build_payload(name, args):
+    from ansible.executor.module_common import modify_module
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.template import Templar
+    from ansible.utils.collection_loader._collection_finder import _AnsibleCollectionFinder
+
+    _AnsibleCollectionFinder(paths=[sys.path[0]])._install()
+    built = modify_module(
+        module_name=f"jphetphoumy.wallix.{name}", module_path=os.path.join(ROOT, 'plugins', 'modules', f"{name}.py"),
+        module_args=args, templar=Templar(loader=DataLoader()),
+        task_vars=dict(ansible_python_interpreter=sys.executable), module_compression='ZIP_DEFLATED',
+    )
+    return built.b_module_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', action='append', choices=list(MODULES), help="default: all")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    _import_collection()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'mock_wallix.py'), '--port', '0', '--dataset', '1'],
+        stdout=subprocess.PIPE, text=True,
+    )
+    results = []
+    try:
+        url = server.stdout.readline().strip()
+        session_dir = tempfile.mkdtemp(prefix='wallix-startup-')
+        atexit.register(shutil.rmtree, session_dir, ignore_errors=True)
+        print(f"{'module':<24}{'payload_kb':>11}{'median_ms':>11}{'min_ms':>9}{'max_ms':>9}")
+        for name in args.module or MODULES:
+            module_args = dict(MODULES[name], api_url=url, wallix_user='bench', wallix_password='bench',
+                               session_cache_dir=session_dir)
+            payload = build_payload(name, module_args)
+            with tempfile.NamedTemporaryFile(suffix='.py', delete=False) as f:
+                f.write(payload)
+            try:
+                timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    output = subprocess.run([sys.executable, f.name], stdout=subprocess.PIPE, text=True,
+                                            stdin=subprocess.DEVNULL).stdout
+                    timings.append((time.perf_counter() - start) * 1000)
+                    result = json.loads(output)
+                    if result.get('failed') or result.get('changed'):
+                        raise SystemExit(f"{name}: unexpected result {result}")
+            finally:
+                os.unlink(f.name)
+            result = dict(module=name, payload_kb=round(len(payload) / 1024, 1),
+                          median_ms=round(statistics.median(timings), 1),
+                          min_ms=round(min(timings), 1), max_ms=round(max(timings), 1))
+            results.append(result)
+            print(f"{name:<24}{result['payload_kb']:>11}{result['median_ms']:>11}{result['min_ms']:>9}"
+                  f"{result['max_ms']:>9}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
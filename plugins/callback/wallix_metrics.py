@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+DOCUMENTATION = r'''
+name: wallix_metrics
+type: aggregate
+short_description: Sum the Wallix API metrics of a play
+description:
+  - Adds up the C(wallix_metrics) blocks returned by the tasks run with I(metrics=true) and prints, at the end
+    of the play, the requests sent to the bastion per method and endpoint.
+  - The totals can also be written to a JSON file and to a Prometheus textfile collector file.
+requirements:
+  - enable in configuration, for example C(callbacks_enabled = jphetphoumy.wallix.wallix_metrics)
+options:
+  json_path:
+    description: Write the totals to this file as JSON.
+    type: path
+    env:
+      - name: WALLIX_METRICS_JSON
+    ini:
+      - section: callback_wallix_metrics
+        key: json_path
+  prometheus_path:
+    description:
+      - Write the totals to this file in the Prometheus text format, for the node exporter textfile collector.
+      - The file is replaced atomically; its name must end with C(.prom).
+    type: path
+    env:
+      - name: WALLIX_METRICS_PROMETHEUS
+    ini:
+      - section: callback_wallix_metrics
+        key: prometheus_path
+'''
+
+import json
+import os
+import tempfile
+
+from ansible.plugins.callback import CallbackBase
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_metrics import LATENCY_BUCKETS_MS
+
+
+def _add(total, metrics):
+    for name, endpoint in metrics.get('endpoints', {}).items():
+        current = total.setdefault(name, dict(
+            requests=0, retries=0, statuses={}, elapsed_s=0.0, max_ms=0.0, bytes_sent=0, bytes_received=0, buckets={},
+        ))
+        for field in ('requests', 'retries', 'elapsed_s', 'bytes_sent', 'bytes_received'):
+            current[field] += endpoint.get(field, 0)
+        current['max_ms'] = max(current['max_ms'], endpoint.get('max_ms', 0))
+        for field in ('statuses', 'buckets'):
+            for key, count in endpoint.get(field, {}).items():
+                current[field][key] = current[field].get(key, 0) + count
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(endpoints):
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def labels(name, **extra):
+        method, _, path = name.partition(' ')
+        pairs = dict(method=method, endpoint=path, **extra)
+        return '{' + ','.join(f'{k}="{_label(v)}"' for k, v in pairs.items()) + '}'
+
+    family('wallix_requests_total', 'counter', 'Requests sent to the Wallix API.')
+    for name, endpoint in sorted(endpoints.items()):
+        for status, count in sorted(endpoint['statuses'].items()):
+            lines.append(f"wallix_requests_total{labels(name, status=status)} {count}")
+    for metric, field, help_text in (
+        ('wallix_request_retries_total', 'retries', 'Requests retried because the Wallix API was overloaded.'),
+        ('wallix_request_sent_bytes_total', 'bytes_sent', 'Bytes of request bodies sent to the Wallix API.'),
+        ('wallix_request_received_bytes_total', 'bytes_received', 'Bytes of response bodies received.'),
+    ):
+        family(metric, 'counter', help_text)
+        for name, endpoint in sorted(endpoints.items()):
+            lines.append(f"{metric}{labels(name)} {endpoint[field]}")
+
+    family('wallix_request_duration_seconds', 'histogram', 'Latency of the Wallix API requests.')
+    for name, endpoint in sorted(endpoints.items()):
+        cumulative = 0
+        for bound in LATENCY_BUCKETS_MS:
+            cumulative += endpoint['buckets'].get(str(bound), 0)
+            lines.append(f"wallix_request_duration_seconds_bucket{labels(name, le=bound / 1000)} {cumulative}")
+        lines.append(f"wallix_request_duration_seconds_bucket{labels(name, le='+Inf')} {endpoint['requests']}")
+        lines.append(f"wallix_request_duration_seconds_sum{labels(name)} {round(endpoint['elapsed_s'], 6)}")
+        lines.append(f"wallix_request_duration_seconds_count{labels(name)} {endpoint['requests']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _write(path, text):
+    # Readers such as the node exporter must never see a partial file.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.wallix_metrics-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'jphetphoumy.wallix.wallix_metrics'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super().__init__()
+        self.endpoints = {}
+        self.tasks = 0
+
+    def _collect(self, result):
+        # A looped task carries the metrics of each item in its results.
+        outcomes = result._result.get('results')
+        if not isinstance(outcomes, list):
+            outcomes = [result._result]
+        for outcome in outcomes:
+            if isinstance(outcome, dict) and isinstance(outcome.get('wallix_metrics'), dict):
+                self.tasks += 1
+                _add(self.endpoints, outcome['wallix_metrics'])
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.endpoints:
+            return
+
+        rows = []
+        for name, endpoint in sorted(self.endpoints.items(), key=lambda item: -item[1]['elapsed_s']):
+            errors = sum(count for status, count in endpoint['statuses'].items() if not status.startswith(('2', '3')))
+            rows.append((
+                name, endpoint['requests'], errors, endpoint['retries'], f"{endpoint['elapsed_s']:.3f}",
+                f"{endpoint['elapsed_s'] * 1000 / max(1, endpoint['requests']):.1f}", f"{endpoint['max_ms']:.1f}",
+                endpoint['bytes_sent'], endpoint['bytes_received'],
+            ))
+        totals = ('total',) + tuple(
+            sum(row[i] for row in rows) for i in (1, 2, 3)
+        ) + (f"{sum(e['elapsed_s'] for e in self.endpoints.values()):.3f}", '', '',
+             sum(row[7] for row in rows), sum(row[8] for row in rows))
+
+        header = ('endpoint', 'requests', 'errors', 'retries', 'total_s', 'avg_ms', 'max_ms', 'sent', 'received')
+        widths = [max(len(str(row[i])) for row in [header, totals] + rows) for i in range(len(header))]
+
+        def line(row):
+            return '  '.join(
+                str(value).ljust(width) if i == 0 else str(value).rjust(width)
+                for i, (value, width) in enumerate(zip(row, widths))
+            )
+
+        self._display.banner(f"WALLIX API METRICS ({self.tasks} task results)")
+        self._display.display(line(header))
+        for row in rows:
+            self._display.display(line(row))
+        self._display.display(line(totals))
+
+        json_path = self.get_option('json_path')
+        if json_path:
+            _write(json_path, json.dumps(dict(tasks=self.tasks, endpoints=self.endpoints), indent=2, sort_keys=True))
+        prometheus_path = self.get_option('prometheus_path')
+        if prometheus_path:
+            _write(prometheus_path, prometheus_text(self.endpoints))
@@ -0,0 +1,141 @@
+class ModuleDocFragment(object):
+
+    DOCUMENTATION = r'''
+options:
+  api_url:
+    description:
+      - Base URL of the Wallix API.
+      - Required unless I(api_urls) is set.
+    type: str
+  api_urls:
+    description:
+      - Base URLs of other bastions to apply the same task to, concurrently, along with I(api_url).
+      - Each bastion is read and changed on its own, and a failure on one of them does not stop the others.
+        The results are then returned in C(bastions), one entry per bastion with its C(api_url) and the result
+        the module returns for a single bastion, or C(failed) and C(msg) when it could not be processed.
+      - The session, response cache and rate limit are kept per bastion.
+      - Only supported by the modules creating, updating or deleting objects.
+    type: list
+    elements: str
+  wallix_user:
+    description: Wallix API user.
+    required: true
+    type: str
+  wallix_password:
+    description: Password of the Wallix API user.
+    required: true
+    type: str
+  validate_certs:
+    description: Whether to validate the TLS certificate of the bastion.
+    type: bool
+    default: false
+  timeout:
+    description: Timeout in seconds of each API request.
+    type: int
+    default: 30
+  pool_size:
+    description: Maximum number of keep-alive connections kept open to the bastion.
+    type: int
+    default: 10
+  session_cache:
+    description:
+      - Reuse the bastion session cookie across tasks instead of sending the credentials on every request.
+      - The session is stored in a file only readable by the current user and is renewed transparently when
+        the bastion rejects it.
+      - A session is only reused with the I(wallix_password) it was opened with, checked against a salted HMAC
+        of it stored alongside, so a changed or mistyped password is still sent to the bastion.
+    type: bool
+    default: true
+  session_cache_dir:
+    description: Directory holding the cached sessions, one file per I(api_url) and I(wallix_user).
+    type: path
+    default: ~/.ansible/tmp/wallix
+  session_cache_ttl:
+    description: Number of seconds a cached session is reused before logging in again.
+    type: int
+    default: 600
+  retries:
+    description:
+      - Number of times a request is retried when the bastion is overloaded (HTTP 429, 502, 503, 504)
+        or unreachable, waiting with exponential backoff or as long as its C(Retry-After) header asks.
+      - Only GET, PUT and DELETE requests are retried, and POST requests refused with HTTP 429.
+    type: int
+    default: 3
+  retry_backoff:
+    description: Base delay in seconds of the exponential backoff between retries.
+    type: float
+    default: 1.0
+  retry_max_delay:
+    description:
+      - Longest delay in seconds waited before a retry.
+      - A bastion asking with C(Retry-After) to wait longer fails the request instead of holding the task.
+    type: float
+    default: 60.0
+  rate_limit:
+    description:
+      - Maximum number of requests per second sent to the bastion by all the forks of the controller together.
+      - The shared rate state is kept in I(session_cache_dir). C(0) disables the limit.
+    type: float
+    default: 0
+  rate_limit_burst:
+    description: Number of requests that may be sent at once before I(rate_limit) applies.
+    type: int
+    default: 10
+  metrics:
+    description:
+      - Return a C(wallix_metrics) block with the requests sent by the task, per method and endpoint
+        (count, status codes, retries, latency, bytes sent and received).
+      - The block holds the totals C(requests), C(retries), C(bytes_sent), C(bytes_received), C(elapsed_s) and
+        C(statuses), the C(p50), C(p99) and C(max) of C(latency_ms), and the same counts per method and path
+        under C(endpoints), object names replaced by C({id}), with the number of requests per latency bucket
+        in milliseconds under C(buckets).
+      - With I(api_urls), the block counts the requests to every bastion.
+      - The C(jphetphoumy.wallix.wallix_metrics) callback sums these blocks over the play.
+    type: bool
+    default: false
+  response_cache:
+    description:
+      - Keep the objects read from the bastion in I(session_cache_dir) and reuse them on the next runs.
+      - Objects returned with an C(ETag) or C(Last-Modified) header are revalidated with a conditional request,
+        which the bastion answers with a bodyless C(304 Not Modified) when they did not change.
+      - Objects returned without these headers are reused without any request for I(response_cache_ttl) seconds,
+        so a change made outside Ansible may go unnoticed that long.
+      - Objects written by the collection are dropped from the cache.
+      - Each object is only reused with the I(wallix_password) it was read with, checked against a salted
+        HMAC of it stored alongside; the password itself is never written.
+    type: bool
+    default: false
+  response_cache_ttl:
+    description: Number of seconds an object returned without C(ETag) nor C(Last-Modified) is reused.
+    type: int
+    default: 300
+  profile_dir:
+    description:
+      - Profile the task with cProfile and tracemalloc, from the connection to the bastion to the end of the task,
+        and write the profile to this directory on the host running the module.
+      - Two files are written, named after the module, the date and the process. The C(.prof) file holds the
+        cProfile statistics of all the threads, for C(python -m pstats) or snakeviz. The C(.txt) report lists the
+        functions with the most cumulative time and the lines holding the most memory at the highest memory sample.
+      - A C(wallix_profile) block is also returned, with the files in C(stats) and C(report), C(elapsed_s),
+        C(peak_memory_kb), the C(functions) with the most cumulative time and the C(allocations) holding the most
+        memory.
+      - Defaults to the C(WALLIX_PROFILE) environment variable of the module, which the C(environment) keyword
+        can set for a whole play. Profiling slows the task down noticeably.
+    type: path
+'''
+
+    # Bulk modules able to resume an interrupted run.
+    CHECKPOINT = r'''
+options:
+  checkpoint:
+    description:
+      - Journal file recording the outcome of every object as soon as it is applied, on the host running the module.
+      - When a run is interrupted or fails, running the same task again skips the objects recorded as applied
+        and reports their recorded outcome; the existing objects are not listed again once all are applied.
+        A task with other objects, or for another bastion, starts a new journal.
+      - The journal is removed once every object is applied. It is not used in check mode.
+      - With I(api_urls), each bastion has its own journal, named after I(checkpoint).
+      - Under C(async), the progress is published every second in the job status returned by C(async_status),
+        as C(progress) with the C(total), C(done), C(failed) and C(resumed) counts.
+    type: path
+'''
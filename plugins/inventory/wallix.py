@@ -0,0 +1,179 @@
+DOCUMENTATION = r'''
+name: wallix
+author:
+  - You 😉
+short_description: Wallix Bastion devices inventory source
+description:
+  - Builds hosts from the devices of a Wallix Bastion and groups from its target groups.
+  - Devices are read page by page; only the fields used by the inventory are kept in memory and in the cache.
+  - The configuration file name must end with C(wallix.yml) or C(wallix.yaml).
+  - Host variables C(wallix_tags) (dict), C(wallix_services) and C(wallix_local_domains) (lists of names)
+    can be used in I(keyed_groups).
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for the plugin.
+    required: true
+    choices: ['jphetphoumy.wallix.wallix']
+  api_url:
+    description: Base URL of the Wallix API.
+    required: true
+    type: str
+    env:
+      - name: WALLIX_API_URL
+  wallix_user:
+    description: Wallix API user.
+    required: true
+    type: str
+    env:
+      - name: WALLIX_USER
+  wallix_password:
+    description: Password of the Wallix API user.
+    required: true
+    type: str
+    env:
+      - name: WALLIX_PASSWORD
+  validate_certs:
+    description: Whether to validate the TLS certificate of the bastion.
+    type: bool
+    default: false
+  timeout:
+    description: Timeout in seconds of each API request.
+    type: int
+    default: 30
+  page_size:
+    description: Number of devices fetched per request.
+    type: int
+    default: 500
+  hostname:
+    description: Device field used as inventory hostname.
+    type: str
+    default: device_name
+    choices: [device_name, alias, host]
+  target_groups:
+    description: Add one group per target group, holding the devices it references.
+    type: bool
+    default: true
+'''
+
+EXAMPLES = r'''
+# wallix.yml
+plugin: jphetphoumy.wallix.wallix
+api_url: https://bastion.example.com
+wallix_user: admin
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/tmp/wallix_inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: wallix_tags
+    prefix: tag
+  - key: wallix_services
+    prefix: service
+'''
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixClient, WallixError
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_devices import iter_devices
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'jphetphoumy.wallix.wallix'
+
+    def verify_file(self, path):
+        return super().verify_file(path) and path.endswith(('wallix.yml', 'wallix.yaml'))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super().parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        data = None
+        if use_cache:
+            try:
+                data = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+        if data is None:
+            data = self._fetch()
+        if update_cache:
+            self._cache[cache_key] = data
+
+        self._populate(data)
+
+    def _fetch(self):
+        client = WallixClient(
+            self.get_option('api_url'), self.get_option('wallix_user'), self.get_option('wallix_password'),
+            validate_certs=self.get_option('validate_certs'), timeout=self.get_option('timeout'),
+        )
+        page_size = self.get_option('page_size')
+        hostname = self.get_option('hostname')
+
+        try:
+            hosts = {}
+            for device in iter_devices(client, page_size=page_size):
+                name = device.get(hostname) or device['device_name']
+                hosts[device['device_name']] = dict(
+                    name=name,
+                    host=device.get('host'),
+                    alias=device.get('alias'),
+                    description=device.get('description'),
+                    local_domains=[d['domain_name'] for d in device.get('local_domains') or []],
+                    services=[s['service_name'] for s in device.get('services') or []],
+                    tags={t['key']: t.get('value') for t in device.get('tags') or []},
+                )
+
+            groups = {}
+            if self.get_option('target_groups'):
+                for group in client.iter_items("/api/targetgroups", page_size=page_size):
+                    groups[group['group_name']] = sorted(_target_group_devices(group))
+        except WallixError as e:
+            raise AnsibleError(str(e))
+
+        return dict(hosts=hosts, groups=groups)
+
+    def _populate(self, data):
+        strict = self.get_option('strict')
+        hosts = data['hosts']
+
+        for device in hosts.values():
+            name = device['name']
+            self.inventory.add_host(name)
+            if device['host']:
+                self.inventory.set_variable(name, 'ansible_host', device['host'])
+            host_vars = dict(
+                wallix_alias=device['alias'],
+                wallix_description=device['description'],
+                wallix_local_domains=device['local_domains'],
+                wallix_services=device['services'],
+                wallix_tags=device['tags'],
+            )
+            for key, value in host_vars.items():
+                self.inventory.set_variable(name, key, value)
+
+            self._set_composite_vars(self.get_option('compose'), host_vars, name, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), host_vars, name, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), host_vars, name, strict=strict)
+
+        for group_name, device_names in data['groups'].items():
+            group = self.inventory.add_group(self._sanitize_group_name(group_name))
+            for device_name in device_names:
+                if device_name in hosts:
+                    self.inventory.add_child(group, hosts[device_name]['name'])
+
+
+def _target_group_devices(group):
+    devices = set()
+    for section in ('session', 'password_retrieval'):
+        for entries in (group.get(section) or {}).values():
+            for entry in entries or []:
+                if isinstance(entry, dict) and entry.get('device'):
+                    devices.add(entry['device'])
+    return devices
@@ -0,0 +1,157 @@
+DOCUMENTATION = r'''
+name: wallix
+author:
+  - You 😉
+short_description: Look up Wallix objects by name
+description:
+  - Returns objects of a Wallix Bastion collection (C(users), C(usergroups), C(devices), C(targetgroups),
+    C(authorizations)) by name, or the whole collection when no name is given.
+  - The whole collection is fetched once and cached on the controller for I(cache_ttl) seconds.
+    Concurrent forks wait for a single in-flight fetch instead of all querying the API.
+    A cached collection is only reused with the I(wallix_password) it was fetched with.
+  - Names not found in the collection are returned as C(None).
+options:
+  _terms:
+    description: The collection, followed by the names of the objects to look up.
+    required: true
+  api_url:
+    description: Base URL of the Wallix API.
+    required: true
+    type: str
+  wallix_user:
+    description: Wallix API user.
+    required: true
+    type: str
+  wallix_password:
+    description: Password of the Wallix API user.
+    required: true
+    type: str
+  validate_certs:
+    description: Whether to validate the TLS certificate of the bastion.
+    type: bool
+    default: false
+  timeout:
+    description: Timeout in seconds of each API request.
+    type: int
+    default: 30
+  page_size:
+    description: Number of objects fetched per request.
+    type: int
+    default: 500
+  cache_dir:
+    description: Directory holding the cached collections and sessions.
+    type: path
+    default: ~/.ansible/tmp/wallix
+  cache_ttl:
+    description: Number of seconds a fetched collection is reused. C(0) always fetches it again.
+    type: int
+    default: 300
+'''
+
+EXAMPLES = r'''
+- name: Fail early when a target group does not exist
+  ansible.builtin.assert:
+    that: lookup('jphetphoumy.wallix.wallix', 'targetgroups', 'linux_servers', **wallix_conn) is not none
+
+- name: All the user groups
+  ansible.builtin.debug:
+    msg: "{{ query('jphetphoumy.wallix.wallix', 'usergroups', **wallix_conn) | map(attribute='group_name') }}"
+'''
+
+RETURN = r'''
+_raw:
+  description: The objects looked up, C(None) for the missing ones.
+  type: list
+  elements: dict
+'''
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import (
+    RESOURCE_KEYS, WallixClient, WallixError, check_credentials, password_credentials,
+)
+
+# Collections already loaded by this process, indexed by name, per password.
+_INDEXES = {}
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+
+        if not terms:
+            raise AnsibleError("The wallix lookup needs a collection name.")
+        resource, names = terms[0], terms[1:]
+        if resource not in RESOURCE_KEYS:
+            raise AnsibleError(f"Unknown Wallix collection {resource}, expected one of {', '.join(RESOURCE_KEYS)}.")
+
+        index = self._index(resource)
+        if not names:
+            return list(index.values())
+        return [index.get(name) for name in names]
+
+    def _index(self, resource):
+        api_url = self.get_option('api_url').rstrip('/')
+        key = hashlib.sha256(f"{api_url}\0{self.get_option('wallix_user')}\0{resource}".encode('utf-8')).hexdigest()
+        password = self.get_option('wallix_password')
+        index = _INDEXES.get((key, password))
+        if index is None:
+            identity = RESOURCE_KEYS[resource]
+            index = _INDEXES[(key, password)] = {item[identity]: item for item in self._load(resource, key)}
+        return index
+
+    def _load(self, resource, key):
+        cache_dir = os.path.expanduser(self.get_option('cache_dir'))
+        cache_path = os.path.join(cache_dir, f"lookup-{key}.json")
+
+        items = self._read_cache(cache_path)
+        if items is not None:
+            return items
+
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        with open(f"{cache_path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another fork may have fetched the collection while we waited.
+            items = self._read_cache(cache_path)
+            if items is None:
+                items = self._fetch(resource, cache_dir)
+                self._write_cache(cache_path, cache_dir, items)
+        return items
+
+    def _read_cache(self, cache_path):
+        try:
+            if time.time() - os.path.getmtime(cache_path) >= self.get_option('cache_ttl'):
+                return None
+            with open(cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Only what this password was given by the bastion.
+        if not isinstance(cached, dict) or not check_credentials(cached, self.get_option('wallix_password')):
+            return None
+        return cached.get('items')
+
+    def _write_cache(self, cache_path, cache_dir, items):
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.lookup-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(password_credentials(self.get_option('wallix_password')), items=items), f)
+        os.replace(tmp_path, cache_path)
+
+    def _fetch(self, resource, cache_dir):
+        client = WallixClient(
+            self.get_option('api_url'), self.get_option('wallix_user'), self.get_option('wallix_password'),
+            validate_certs=self.get_option('validate_certs'), timeout=self.get_option('timeout'),
+            session_cache_dir=cache_dir,
+        )
+        try:
+            return list(client.iter_items(f"/api/{resource}", page_size=self.get_option('page_size')))
+        except WallixError as e:
+            raise AnsibleError(str(e))
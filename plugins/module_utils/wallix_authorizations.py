@@ -0,0 +1,209 @@
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import RESOURCE_KEYS, WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import compute_changes
+
+MUTABLE_FIELDS = [
+    "description", "subprotocols", "is_critical", "is_recorded",
+    "authorize_password_retrieval", "authorize_sessions",
+    "authorize_session_sharing", "session_sharing_mode",
+    "approval_required"
+]
+
+APPROVAL_ONLY_FIELDS = [
+    "approvers", "has_comment", "mandatory_comment",
+    "has_ticket", "mandatory_ticket",
+    "active_quorum", "inactive_quorum",
+    "single_connection", "approval_timeout"
+]
+
+
+def authorization_options():
+    return dict(
+        authorization_name=dict(type='str', required=True),
+        user_group=dict(type='str', required=True),
+        target_group=dict(type='str', required=True),
+        description=dict(type='str', required=False),
+        subprotocols=dict(type='list', elements='str', required=False),
+        is_critical=dict(type='bool', required=False, default=False),
+        is_recorded=dict(type='bool', required=False, default=False),
+        authorize_password_retrieval=dict(type='bool', required=False, default=False, no_log=False),
+        authorize_sessions=dict(type='bool', required=False, default=False),
+        approval_required=dict(type='bool', required=False, default=False),
+        has_comment=dict(type='bool', required=False),
+        mandatory_comment=dict(type='bool', required=False),
+        has_ticket=dict(type='bool', required=False),
+        mandatory_ticket=dict(type='bool', required=False),
+        approvers=dict(type='list', elements='str', required=False),
+        active_quorum=dict(type='int', required=False),
+        inactive_quorum=dict(type='int', required=False),
+        single_connection=dict(type='bool', required=False),
+        approval_timeout=dict(type='int', required=False),
+        authorize_session_sharing=dict(type='bool', required=False, default=False),
+        session_sharing_mode=dict(type='str', required=False),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+    )
+
+
+def build_authorization_payloads(p):
+    create_payload = {
+        "authorization_name": p['authorization_name'],
+        "user_group": p['user_group'],
+        "target_group": p['target_group']
+    }
+
+    update_payload = {}
+
+    for field in MUTABLE_FIELDS:
+        if p.get(field) is not None:
+            create_payload[field] = p[field]
+            update_payload[field] = p[field]
+
+    if p["approval_required"]:
+        for field in APPROVAL_ONLY_FIELDS:
+            if p.get(field) is not None:
+                create_payload[field] = p[field]
+                update_payload[field] = p[field]
+
+    return create_payload, update_payload
+
+
+def is_authorization_different(existing, desired):
+    def normalize(val):
+        if isinstance(val, list):
+            return sorted(val)
+        return val
+
+    for key, value in desired.items():
+        if key not in existing:
+            return True
+        if normalize(existing[key]) != normalize(value):
+            return True
+
+    for key in existing:
+        if key in ["subprotocols"] and key not in desired:
+            return True
+        if isinstance(existing.get(key), list) and desired.get(key) is None:
+            return True
+
+    return False
+
+
+def get_authorization(client, authorization_id):
+    r = client.get(api_path('authorizations', authorization_id))
+    if r.status_code == 404:
+        return None
+    elif r.status_code != 200:
+        raise WallixError(f"Failed to get authorization: {r.status_code} {r.text}")
+    return r.json()
+
+
+def list_authorizations(client, page_size=500):
+    key = RESOURCE_KEYS['authorizations']
+    return {auth[key]: auth for auth in client.iter_items("/api/authorizations", page_size=page_size)}
+
+
+def create_authorization(client, payload):
+    r = client.post("/api/authorizations", payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to create authorization: {r.status_code} {r.text}")
+
+
+def update_authorization(client, authorization_id, payload):
+    r = client.put(api_path('authorizations', authorization_id), payload, params={'force': 'true'})
+    if r.status_code != 204:
+        raise WallixError(f"Failed to update authorization: {r.status_code} {r.text}")
+
+
+def delete_authorization(client, authorization_id):
+    r = client.delete(api_path('authorizations', authorization_id))
+    if r.status_code != 204:
+        raise WallixError(f"Failed to delete authorization: {r.status_code} {r.text}")
+
+
+def reconcile_authorization(client, existing, params, check_mode=False):
+    authorization_id = params['authorization_name']
+
+    if params['state'] == 'absent':
+        if not existing:
+            return dict(name=authorization_id, changed=False, msg="Authorization already absent.")
+        if not check_mode:
+            delete_authorization(client, authorization_id)
+        return dict(name=authorization_id, changed=True, msg="Authorization deleted.")
+
+    create_payload, update_payload = build_authorization_payloads(params)
+    if not existing:
+        if not check_mode:
+            create_authorization(client, create_payload)
+        return dict(name=authorization_id, changed=True, msg="Authorization created.")
+
+    if not is_authorization_different(existing, update_payload):
+        return dict(name=authorization_id, changed=False, msg="Authorization already up to date.")
+    if not check_mode:
+        # Only send the changed fields; when the difference lies in fields
+        # absent from the update payload, send it whole as before.
+        changes = compute_changes(existing, update_payload)
+        update_authorization(client, authorization_id, changes or update_payload)
+    return dict(name=authorization_id, changed=True, msg="Authorization updated.")
+
+
+def matrix_options():
+    shared = {k: v for k, v in authorization_options().items()
+              if k not in ('authorization_name', 'user_group', 'target_group')}
+    return dict(
+        shared,
+        user_groups=dict(type='list', elements='str', required=False),
+        target_groups=dict(type='list', elements='str', required=False),
+        pairs=dict(type='list', elements='dict', required=False, options=dict(
+            user_group=dict(type='str', required=True),
+            target_group=dict(type='str', required=True),
+            authorization_name=dict(type='str', required=False),
+            description=dict(type='str', required=False),
+            state=dict(type='str', choices=['present', 'absent'], required=False),
+        )),
+        name_template=dict(type='str', default='{user_group}_{target_group}'),
+        exclusive=dict(type='bool', default=False),
+    )
+
+
+def matrix_authorizations(p):
+    # One set of authorization parameters per (user_group, target_group):
+    # the cross product of user_groups and target_groups, then pairs, each
+    # with the shared settings unless the pair overrides them.
+    shared = {k: p[k] for k in authorization_options() if k in p}
+    pairs = [dict(user_group=ug, target_group=tg) for ug in p['user_groups'] or [] for tg in p['target_groups'] or []]
+    pairs += [{k: v for k, v in pair.items() if v is not None} for pair in p['pairs'] or []]
+
+    desired = {}
+    for pair in pairs:
+        params = dict(shared, **pair)
+        if not params.get('authorization_name'):
+            params['authorization_name'] = p['name_template'].format(**params)
+        desired[(params['user_group'], params['target_group'])] = params
+    return desired
+
+
+def matrix_plan(existing, desired, exclusive=False):
+    # Pairs each desired authorization with the existing one between the same
+    # groups (whatever its name) or with the same name; with exclusive, the
+    # other existing authorizations between the groups of the matrix are
+    # deleted. Returns (params, existing) tuples.
+    by_pair = {(auth.get('user_group'), auth.get('target_group')): auth for auth in existing.values()}
+    plan = []
+    for pair, params in desired.items():
+        current = by_pair.get(pair)
+        if current is not None:
+            params = dict(params, authorization_name=current['authorization_name'])
+        else:
+            current = existing.get(params['authorization_name'])
+            if current is not None:
+                # Groups cannot be changed: fail on this pair.
+                params = dict(params, conflict=(current.get('user_group'), current.get('target_group')))
+        plan.append((params, current))
+
+    if exclusive:
+        user_groups = {ug for ug, tg in desired}
+        target_groups = {tg for ug, tg in desired}
+        for pair, auth in by_pair.items():
+            if pair not in desired and pair[0] in user_groups and pair[1] in target_groups:
+                plan.append((dict(authorization_name=auth['authorization_name'], user_group=pair[0],
+                                  target_group=pair[1], state='absent'), auth))
+    return plan
@@ -0,0 +1,95 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, wallix_client
+
+
+def run_parallel(func, items, workers, key=None, per_key=0):
+    # Returns one (result, error) tuple per item, in the order of items.
+    # With key and per_key, at most per_key items sharing the same key(item)
+    # run at the same time.
+    def call(item):
+        try:
+            return func(item), None
+        except WallixError as e:
+            return None, str(e)
+
+    if workers <= 1 or len(items) <= 1:
+        return [call(item) for item in items]
+    if key is None or per_key <= 0:
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+            return list(executor.map(call, items))
+
+    pending = {}
+    for i, item in enumerate(items):
+        pending.setdefault(key(item), deque()).append(i)
+    running = dict.fromkeys(pending, 0)
+    results = [None] * len(items)
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        def submit():
+            # Keys at their cap stay first in pending, so this only looks
+            # past a handful of them before finding work or a full pool.
+            drained = []
+            for k, queue in pending.items():
+                if len(futures) >= workers:
+                    break
+                while queue and running[k] < per_key and len(futures) < workers:
+                    i = queue.popleft()
+                    running[k] += 1
+                    futures[executor.submit(call, items[i])] = (i, k)
+                if not queue:
+                    drained.append(k)
+            for k in drained:
+                del pending[k]
+
+        submit()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, k = futures.pop(future)
+                results[i] = future.result()
+                running[k] -= 1
+            submit()
+    return results
+
+
+def run_on_bastions(module, run, **overrides):
+    # Runs run(client) against the bastion of api_url, or concurrently
+    # against every bastion of api_urls (and api_url), and ends the module.
+    # run returns the module result; a result with failed, or a WallixError,
+    # fails its bastion without stopping the others. The wallix_client
+    # overrides apply to every client.
+    p = module.params
+    if not p['api_urls']:
+        client = wallix_client(module, **overrides)
+        try:
+            result = run(client)
+        except WallixError as e:
+            module.fail_json(msg=str(e))
+        if result.pop('failed', False):
+            module.fail_json(**result)
+        module.exit_json(**result)
+
+    urls = list(dict.fromkeys(([p['api_url']] if p['api_url'] else []) + p['api_urls']))
+    # Only the first client returns wallix_metrics; the others count their
+    # requests in the same metrics.
+    clients = [wallix_client(module, api_url=urls[0], **overrides)]
+    clients += [wallix_client(module, api_url=url, **dict(overrides, metrics=False)) for url in urls[1:]]
+    for client in clients[1:]:
+        client.metrics = clients[0].metrics
+
+    bastions = []
+    failed = 0
+    for url, (result, error) in zip(urls, run_parallel(run, clients, len(clients))):
+        if error:
+            result = dict(changed=False, failed=True, msg=error)
+        if result.get('failed'):
+            failed += 1
+        bastions.append(dict(result, api_url=url))
+
+    changed = any(result['changed'] for result in bastions)
+    if failed:
+        module.fail_json(msg=f"Failed on {failed} of {len(bastions)} bastions.", changed=changed, bastions=bastions)
+    module.exit_json(changed=changed, bastions=bastions)
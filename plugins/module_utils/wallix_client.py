@@ -0,0 +1,492 @@
+import codecs
+import fcntl
+import hashlib
+import hmac
+import json
+import os
+import random
+import tempfile
+import time
+from email.utils import parsedate_to_datetime
+from http.client import HTTPMessage
+from urllib.parse import quote
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_http import HTTPSession, InvalidRequestError, Response, TransportError
+
+
+# Field identifying the objects of each top-level API collection.
+RESOURCE_KEYS = {
+    'users': 'user_name',
+    'usergroups': 'group_name',
+    'devices': 'device_name',
+    'targetgroups': 'group_name',
+    'authorizations': 'authorization_name',
+}
+
+
+def api_path(*segments):
+    # Path of an API object from its collection and the names leading to it,
+    # each percent-encoded: names may hold spaces, slashes or accents.
+    return '/api/' + '/'.join(quote(str(segment), safe='') for segment in segments)
+
+
+def password_credentials(password):
+    # A random salt and the HMAC of the password under it, stored with what
+    # the password gave access to: a cache file is only reused with the same
+    # password, which is never written itself.
+    salt = os.urandom(16).hex()
+    return dict(salt=salt, credentials=hmac.new(bytes.fromhex(salt), password.encode('utf-8'),
+                                                hashlib.sha256).hexdigest())
+
+
+def check_credentials(entry, password):
+    try:
+        expected = hmac.new(bytes.fromhex(entry['salt']), password.encode('utf-8'), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, entry['credentials'])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+# Answers of an overloaded bastion (or of the proxy in front of it), worth
+# retrying after a while.
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+
+class WallixError(Exception):
+    pass
+
+
+def iter_json_array(r, chunk_size=65536):
+    # Decode the objects of a JSON array response one by one while it is
+    # downloaded, so a large listing is never held in memory as a whole.
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    started = done = False
+    # The body is read to its end even after the closing bracket, so the
+    # connection goes back to the keep-alive pool.
+    for chunk in r.iter_content(chunk_size=chunk_size):
+        if done:
+            continue
+        buf += text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos == len(buf):
+                break
+            if not started:
+                if buf[pos] != '[':
+                    raise WallixError(f"Expected a JSON array from {r.url}")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                done = True
+                break
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Incomplete object, wait for the next chunk.
+                break
+            yield item
+        buf = buf[pos:]
+    if not done:
+        raise WallixError(f"Truncated JSON array from {r.url}")
+
+
+def wallix_argument_spec():
+    return dict(
+        api_url=dict(type='str', required=False),
+        api_urls=dict(type='list', elements='str', required=False),
+        wallix_user=dict(type='str', required=True),
+        wallix_password=dict(type='str', required=True, no_log=True),
+        validate_certs=dict(type='bool', default=False),
+        timeout=dict(type='int', default=30),
+        pool_size=dict(type='int', default=10),
+        session_cache=dict(type='bool', default=True),
+        session_cache_dir=dict(type='path', default='~/.ansible/tmp/wallix'),
+        session_cache_ttl=dict(type='int', default=600),
+        retries=dict(type='int', default=3),
+        retry_backoff=dict(type='float', default=1.0),
+        retry_max_delay=dict(type='float', default=60.0),
+        rate_limit=dict(type='float', default=0),
+        rate_limit_burst=dict(type='int', default=10),
+        metrics=dict(type='bool', default=False),
+        response_cache=dict(type='bool', default=False),
+        response_cache_ttl=dict(type='int', default=300),
+        profile_dir=dict(type='path', required=False),
+    )
+
+
+class RateLimiter:
+    # Token bucket shared by every process using the same state file, so all
+    # the forks of a run together stay under the rate.
+    def __init__(self, path, rate, burst):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        with open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read())
+            except ValueError:
+                state = {}
+            now = time.time()
+            tokens = state.get('tokens', self.burst) + (now - state.get('updated', now)) * self.rate
+            # A negative balance reserves the next tokens for the callers
+            # already waiting.
+            tokens = min(self.burst, tokens) - 1
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(dict(tokens=tokens, updated=now)))
+        if tokens < 0:
+            time.sleep(-tokens / self.rate)
+
+
+class ResponseCache:
+    # GET responses of one API user kept on disk between runs. Responses with
+    # an ETag or Last-Modified are revalidated with a conditional request;
+    # the others are served locally for ttl seconds, the file mtime being
+    # refreshed whenever a new fetch returns the same content. Each entry is
+    # only read back with the password it was fetched with.
+    def __init__(self, cache_dir, api_url, wallix_user, wallix_password, ttl):
+        self.cache_dir = cache_dir
+        self.prefix = f"{api_url}\0{wallix_user}\0"
+        self.password = wallix_password
+        self.ttl = ttl
+
+    def path(self, path, params=None):
+        query = json.dumps(sorted((params or {}).items()))
+        key = hashlib.sha256(f"{self.prefix}{path}\0{query}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"response-{key}.json")
+
+    @staticmethod
+    def parents(path):
+        # The path itself and each shorter one under /api.
+        parts = path.rstrip('/').split('/')
+        return ['/'.join(parts[:i]) for i in range(len(parts), 2, -1)]
+
+    def load(self, cache_path):
+        try:
+            with open(cache_path) as f:
+                entry = json.load(f)
+            if not check_credentials(entry, self.password):
+                return None
+            entry['fresh'] = time.time() - os.path.getmtime(cache_path) < self.ttl
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def store(self, cache_path, entry, r):
+        body = r.content
+        digest = hashlib.sha256(body).hexdigest()
+        etag, last_modified = r.headers.get('ETag'), r.headers.get('Last-Modified')
+        try:
+            if entry and entry['sha256'] == digest and entry.get('etag') == etag:
+                os.utime(cache_path)
+                return
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.response-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(password_credentials(self.password), sha256=digest, etag=etag,
+                               last_modified=last_modified, body=body.decode('utf-8')), f)
+            os.replace(tmp_path, cache_path)
+        except (OSError, UnicodeDecodeError):
+            pass
+
+    def drop(self, cache_path):
+        try:
+            os.unlink(cache_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def response(entry, url):
+        headers = HTTPMessage()
+        headers['Content-Type'] = 'application/json'
+        return Response(url, 200, headers, content=entry['body'].encode('utf-8'))
+
+
+class WallixClient:
+    def __init__(self, api_url, wallix_user, wallix_password, validate_certs=False, timeout=30, pool_size=10,
+                 session_cache_dir=None, session_cache_ttl=600, retries=3, retry_backoff=1.0, retry_max_delay=60.0,
+                 rate_limit=0, rate_limit_burst=10, rate_limit_dir=None, metrics=False,
+                 response_cache_dir=None, response_cache_ttl=300):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_max_delay = retry_max_delay
+        self.rate_limiter = None
+        self.metrics = None
+        if metrics:
+            from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_metrics import RequestMetrics
+            self.metrics = RequestMetrics()
+        self.response_cache = None
+        self.auth = (wallix_user, wallix_password)
+        self.session_cache_ttl = session_cache_ttl
+        self.session_cache_path = None
+        self.cached_cookies = None
+
+        # One keep-alive session per module run so the GET and the following
+        # POST/PUT/DELETE share the same TLS connection.
+        self.session = HTTPSession(self.api_url, validate_certs=validate_certs, timeout=timeout, pool_size=pool_size)
+        self.session.auth = self.auth
+
+        if session_cache_dir:
+            key = hashlib.sha256(f"{self.api_url}\0{wallix_user}".encode('utf-8')).hexdigest()
+            self.session_cache_path = os.path.join(os.path.expanduser(session_cache_dir), f"session-{key}.json")
+            self._load_session()
+
+        if rate_limit > 0 and rate_limit_dir:
+            key = hashlib.sha256(self.api_url.encode('utf-8')).hexdigest()
+            path = os.path.join(os.path.expanduser(rate_limit_dir), f"ratelimit-{key}.json")
+            self.rate_limiter = RateLimiter(path, rate_limit, max(1, rate_limit_burst))
+
+        if response_cache_dir:
+            self.response_cache = ResponseCache(os.path.expanduser(response_cache_dir), self.api_url, wallix_user,
+                                                wallix_password, response_cache_ttl)
+
+    def _load_session(self):
+        try:
+            with open(self.session_cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get('expires', 0) <= time.time() or not cached.get('cookies'):
+            return
+        # A session opened with another password, since changed or mistyped,
+        # must not stand in for a login with this one.
+        if not check_credentials(cached, self.auth[1]):
+            return
+        # Authenticate with the bastion session cookie only, so the bastion
+        # does not re-check the credentials (and LDAP) on every request.
+        self.cached_cookies = cached['cookies']
+        self.session.cookies.update(self.cached_cookies)
+        self.session.auth = None
+
+    def _store_session(self):
+        cookies = dict(self.session.cookies)
+        if not cookies or cookies == self.cached_cookies:
+            return
+        cache_dir = os.path.dirname(self.session_cache_path)
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.session-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(password_credentials(self.auth[1]), cookies=cookies,
+                               expires=time.time() + self.session_cache_ttl), f)
+            os.replace(tmp_path, self.session_cache_path)
+        except OSError:
+            return
+        self.cached_cookies = cookies
+
+    def _drop_session(self):
+        self.session.cookies.clear()
+        self.session.auth = self.auth
+        self.cached_cookies = None
+        try:
+            os.unlink(self.session_cache_path)
+        except OSError:
+            pass
+
+    def _send(self, method, url, headers, data, params, stream=False):
+        start = time.perf_counter()
+        try:
+            r = self.session.request(method, url, headers=headers, data=data, params=params, stream=stream)
+        except TransportError as e:
+            if self.metrics:
+                self.metrics.record(method, url, 'error', time.perf_counter() - start, len(data or ''))
+            raise WallixError(f"Request {method} {url} failed: {e}")
+        if self.metrics:
+            # The latency of a streamed listing is the time to its headers;
+            # its body is counted by iter_items once read.
+            self.metrics.record(method, url, r.status_code, time.perf_counter() - start, len(data or ''),
+                                0 if stream else len(r.content))
+        return r
+
+    def _retry_delay(self, attempt, r=None):
+        retry_after = r.headers.get('Retry-After') if r is not None else None
+        if retry_after:
+            try:
+                return max(0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        # Exponential backoff with full jitter, so the forks do not retry in step.
+        return min(self.retry_max_delay, random.uniform(0, self.retry_backoff * 2 ** attempt))
+
+    def _send_with_retries(self, method, url, headers, data, params, stream=False):
+        # Only idempotent requests are replayed; a POST is only replayed when
+        # the bastion explicitly refused it with 429.
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                r = self._send(method, url, headers, data, params, stream=stream)
+            except InvalidRequestError as e:
+                raise WallixError(f"Request {method} {url} is invalid: {e}")
+            except WallixError:
+                if not idempotent or attempt >= self.retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+            else:
+                retryable = r.status_code in RETRY_STATUSES and (idempotent or r.status_code == 429)
+                if not retryable or attempt >= self.retries:
+                    return r
+                r.close()
+                delay = self._retry_delay(attempt, r)
+                if delay > self.retry_max_delay:
+                    # Waiting that long would hold the task, and every worker
+                    # thread of a bulk module, for as long.
+                    raise WallixError(f"Request {method} {url} answered {r.status_code} with a Retry-After of "
+                                      f"{round(delay)}s, more than retry_max_delay ({self.retry_max_delay}s).")
+                time.sleep(delay)
+            if self.metrics:
+                self.metrics.record_retry(method, url)
+            attempt += 1
+
+    def request(self, method, path, payload=None, params=None, stream=False, cache=True):
+        if self.response_cache is None or stream or not cache:
+            return self._request(method, path, payload, params, stream=stream)
+
+        cache_path = self.response_cache.path(path, params)
+        if method != 'GET':
+            # Whatever the outcome, the cached object may now be outdated, and
+            # so may the objects it belongs to: a device embeds its services.
+            for cached_path in self.response_cache.parents(path):
+                self.response_cache.drop(self.response_cache.path(cached_path))
+            return self._request(method, path, payload, params)
+
+        entry = self.response_cache.load(cache_path)
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if entry and not headers and entry['fresh']:
+            return self.response_cache.response(entry, f"{self.api_url}{path}")
+
+        r = self._request(method, path, payload, params, headers=headers)
+        if r.status_code == 304 and entry:
+            return self.response_cache.response(entry, r.url)
+        if r.status_code == 200:
+            self.response_cache.store(cache_path, entry, r)
+        elif entry:
+            self.response_cache.drop(cache_path)
+        return r
+
+    def _request(self, method, path, payload=None, params=None, stream=False, headers=None):
+        url = f"{self.api_url}{path}"
+        headers = dict(headers or {})
+        data = None
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+            data = json.dumps(payload)
+        r = self._send_with_retries(method, url, headers, data, params, stream=stream)
+        if self.session_cache_path is None:
+            return r
+        if r.status_code == 401 and self.session.auth is None:
+            # The cached session expired on the bastion side: log in again.
+            r.close()
+            self._drop_session()
+            r = self._send_with_retries(method, url, headers, data, params, stream=stream)
+        if r.status_code != 401:
+            self._store_session()
+        return r
+
+    def get(self, path, params=None, stream=False, cache=True):
+        return self.request('GET', path, params=params, stream=stream, cache=cache)
+
+    def post(self, path, payload):
+        return self.request('POST', path, payload=payload)
+
+    def put(self, path, payload, params=None):
+        return self.request('PUT', path, payload=payload, params=params)
+
+    def delete(self, path):
+        return self.request('DELETE', path)
+
+    def iter_items(self, path, params=None, page_size=500, missing_ok=False, offset=0):
+        params = dict(params or {})
+        attempt = 0
+        while True:
+            params.update(offset=offset, limit=page_size)
+            r = self.get(path, params=params, stream=True)
+            count = 0
+            try:
+                if r.status_code == 404 and missing_ok:
+                    return
+                if r.status_code != 200:
+                    raise WallixError(f"Failed to list {path}: {r.status_code} {r.text}")
+                for item in iter_json_array(r):
+                    count += 1
+                    yield item
+            except TransportError as e:
+                # The page broke off while it was being read: the listing goes
+                # on from the first item not yielded yet.
+                if attempt >= self.retries:
+                    raise WallixError(f"Failed to list {path}: {e}")
+                time.sleep(self._retry_delay(attempt))
+                if self.metrics:
+                    self.metrics.record_retry('GET', r.url)
+                attempt += 1
+                offset += count
+                continue
+            finally:
+                if self.metrics:
+                    self.metrics.record_received('GET', r.url, r.bytes_read)
+                r.close()
+            if count < page_size:
+                return
+            attempt = 0
+            offset += page_size
+
+
+def wallix_client(module, **overrides):
+    p = module.params
+    api_url = overrides.pop('api_url', None)
+    if api_url is None:
+        # Only run_on_bastions() passes each of api_urls.
+        if p.get('api_urls'):
+            module.fail_json(msg="api_urls is not supported by this module, use api_url.")
+        if not p['api_url']:
+            module.fail_json(msg="missing required arguments: api_url")
+        api_url = p['api_url']
+    profile_dir = p['profile_dir'] or os.environ.get('WALLIX_PROFILE')
+    if profile_dir and not hasattr(module, '_wallix_profiler'):
+        from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_profile import profile_module
+        profile_module(module, profile_dir)
+    kwargs = dict(
+        validate_certs=p['validate_certs'], timeout=p['timeout'], pool_size=p['pool_size'],
+        session_cache_dir=p['session_cache_dir'] if p['session_cache'] else None,
+        session_cache_ttl=p['session_cache_ttl'],
+        retries=p['retries'], retry_backoff=p['retry_backoff'], retry_max_delay=p['retry_max_delay'],
+        rate_limit=p['rate_limit'], rate_limit_burst=p['rate_limit_burst'], rate_limit_dir=p['session_cache_dir'],
+        metrics=p['metrics'],
+        response_cache_dir=p['session_cache_dir'] if p['response_cache'] else None,
+        response_cache_ttl=p['response_cache_ttl'],
+    )
+    kwargs.update(overrides)
+    client = WallixClient(api_url, p['wallix_user'], p['wallix_password'], **kwargs)
+    if client.metrics:
+        _return_metrics(module, client.metrics)
+    return client
+
+
+def _return_metrics(module, metrics):
+    # Add wallix_metrics to whatever result the module ends with, success or
+    # failure, without every module having to pass it along.
+    exit_json, fail_json = module.exit_json, module.fail_json
+    module.exit_json = lambda **result: exit_json(wallix_metrics=metrics.result(), **result)
+    module.fail_json = lambda msg, **result: fail_json(msg=msg, wallix_metrics=metrics.result(), **result)
@@ -0,0 +1,109 @@
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_parallel
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import compute_changes
+
+
+def device_account_options():
+    return dict(
+        account_name=dict(type='str', required=True),
+        account_login=dict(type='str', required=False),
+        description=dict(type='str', required=False),
+        credentials=dict(type='list', elements='dict', required=False),
+        checkout_policy=dict(type='str', required=False, default='default'),
+        device_id=dict(type='str', required=True),
+        domain_id=dict(type='str', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+    )
+
+
+def build_account_payload(params):
+    payload = {
+        "account_name": params['account_name'],
+        "account_login": params.get('account_login', params['account_name']),
+        "description": params['description'],
+        "credentials": params['credentials'],
+        "checkout_policy": params['checkout_policy'],
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+def account_changes(existing, payload):
+    # Credentials hold secrets the API does not return.
+    return compute_changes(existing, payload, defaults=dict(checkout_policy='default'),
+                           ignore=('account_name', 'credentials'))
+
+
+def get_account(client, device_id, domain_id, account_id):
+    r = client.get(api_path('devices', device_id, 'localdomains', domain_id, 'accounts', account_id))
+    if r.status_code == 404:
+        return None
+    elif r.status_code != 200:
+        raise WallixError(f"Failed to get account: {r.status_code} {r.text}")
+    return r.json()
+
+
+def list_accounts(client, device_id, domain_id, page_size=500):
+    # A device or domain that does not exist yet has no accounts.
+    path = api_path('devices', device_id, 'localdomains', domain_id, 'accounts')
+    return {account['account_name']: account for account in client.iter_items(path, page_size=page_size, missing_ok=True)}
+
+
+def list_device_accounts(client, items, page_size=500, workers=8):
+    # The existing accounts of every device and domain of items, listed once
+    # per domain, keyed by (device_id, domain_id, account_name).
+    domains = sorted({(item['device_id'], item['domain_id']) for item in items})
+
+    def fetch(domain):
+        return list_accounts(client, domain[0], domain[1], page_size=page_size)
+
+    existing = {}
+    for (device_id, domain_id), (accounts, error) in zip(domains, run_parallel(fetch, domains, workers)):
+        if error:
+            raise WallixError(error)
+        for name, account in accounts.items():
+            existing[(device_id, domain_id, name)] = account
+    return existing
+
+
+def create_account(client, device_id, domain_id, payload):
+    r = client.post(api_path('devices', device_id, 'localdomains', domain_id, 'accounts'), payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to create account: {r.status_code} {r.text}")
+
+
+def update_account(client, device_id, domain_id, account_id, payload):
+    r = client.put(api_path('devices', device_id, 'localdomains', domain_id, 'accounts', account_id), payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to update account: {r.status_code} {r.text}")
+
+
+def delete_account(client, device_id, domain_id, account_id):
+    r = client.delete(api_path('devices', device_id, 'localdomains', domain_id, 'accounts', account_id))
+    if r.status_code != 204:
+        raise WallixError(f"Failed to delete account: {r.status_code} {r.text}")
+
+
+def reconcile_account(client, account, params, check_mode=False):
+    account_id = params['account_name']
+    device_id = params['device_id']
+    domain_id = params['domain_id']
+
+    if params['state'] == 'absent':
+        if not account:
+            return dict(name=account_id, changed=False, msg="Account already absent.")
+        if not check_mode:
+            delete_account(client, device_id, domain_id, account_id)
+        return dict(name=account_id, changed=True, msg="Account deleted.")
+
+    payload = build_account_payload(params)
+    if not account:
+        if not check_mode:
+            create_account(client, device_id, domain_id, payload)
+        return dict(name=account_id, changed=True, msg="Account created.")
+
+    changes = account_changes(account, payload)
+    if not changes:
+        return dict(name=account_id, changed=False, msg="Account already up to date.")
+    if not check_mode:
+        update_account(client, device_id, domain_id, account_id, changes)
+    return dict(name=account_id, changed=True, msg="Account updated.")
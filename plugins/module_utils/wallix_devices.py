@@ -0,0 +1,153 @@
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import RESOURCE_KEYS, WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import compute_changes
+
+
+def device_options():
+    return dict(
+        device_name=dict(type='str', required=True),
+        alias=dict(type='str', required=False),
+        description=dict(type='str', required=False),
+        host=dict(type='str', required=True),
+        local_domains=dict(type='list', elements='dict', required=False),
+        services=dict(type='list', elements='dict', required=False),
+        tags=dict(type='list', elements='dict', required=False),
+        state=dict(type='str', choices=['present', 'absent'], default='present'),
+    )
+
+
+def build_device_payload(params):
+    payload = {
+        "device_name": params['device_name'],
+        "alias": params['alias'],
+        "description": params['description'],
+        "host": params['host'],
+        "local_domains": params['local_domains'],
+        "services": params['services'],
+        "tags": params['tags']
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+# Sub-resources of a device, with their endpoint under the device and the
+# field naming each entry. They are not updated through the device itself.
+SUB_RESOURCES = {
+    'services': ('services', 'service_name'),
+    'local_domains': ('localdomains', 'domain_name'),
+}
+
+
+def device_changes(existing, payload):
+    return compute_changes(existing, payload, list_keys=dict(tags='key'), ignore=('device_name',) + tuple(SUB_RESOURCES))
+
+
+def sub_resource_changes(current, wanted, key):
+    # Entries to create, (name, changed fields) to update and names to
+    # delete so the current entries become the wanted ones, matched by name.
+    current = {entry.get(key): entry for entry in current or []}
+    names = set()
+    create, update = [], []
+    for entry in wanted:
+        name = entry.get(key)
+        if name is None:
+            raise WallixError(f"Missing {key} in {entry}")
+        names.add(name)
+        if name not in current:
+            create.append(entry)
+            continue
+        changes = compute_changes(current[name], entry, ignore=(key,))
+        if changes:
+            update.append((name, changes))
+    delete = [name for name in current if name not in names]
+    return create, update, delete
+
+
+def device_sub_resource_changes(existing, payload):
+    changes = {}
+    for field, (_, key) in SUB_RESOURCES.items():
+        if field in payload:
+            create, update, delete = sub_resource_changes(existing.get(field), payload[field], key)
+            if create or update or delete:
+                changes[field] = (create, update, delete)
+    return changes
+
+
+def get_device(client, device_id):
+    r = client.get(api_path('devices', device_id))
+    if r.status_code == 404:
+        return None
+    elif r.status_code != 200:
+        raise WallixError(f"Failed to get device: {r.status_code} {r.text}")
+    return r.json()
+
+
+def iter_devices(client, page_size=500):
+    return client.iter_items("/api/devices", page_size=page_size)
+
+
+def list_devices(client, page_size=500):
+    key = RESOURCE_KEYS['devices']
+    return {device[key]: device for device in iter_devices(client, page_size=page_size)}
+
+
+def create_device(client, payload):
+    r = client.post("/api/devices", payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to create device: {r.status_code} {r.text}")
+
+
+def update_device(client, device_id, payload):
+    r = client.put(api_path('devices', device_id), payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to update device: {r.status_code} {r.text}")
+
+
+def delete_device(client, device_id):
+    r = client.delete(api_path('devices', device_id))
+    if r.status_code != 204:
+        raise WallixError(f"Failed to delete device: {r.status_code} {r.text}")
+
+
+def update_sub_resources(client, device_id, field, create, update, delete):
+    # Removed entries go first, so a renamed entry does not clash with the
+    # one it replaces.
+    collection = SUB_RESOURCES[field][0]
+    for name in delete:
+        r = client.delete(api_path('devices', device_id, collection, name))
+        if r.status_code != 204:
+            raise WallixError(f"Failed to delete {field} {name}: {r.status_code} {r.text}")
+    for name, changes in update:
+        r = client.put(api_path('devices', device_id, collection, name), changes)
+        if r.status_code != 204:
+            raise WallixError(f"Failed to update {field} {name}: {r.status_code} {r.text}")
+    for entry in create:
+        r = client.post(api_path('devices', device_id, collection), entry)
+        if r.status_code != 204:
+            raise WallixError(f"Failed to create {field} {entry[SUB_RESOURCES[field][1]]}: {r.status_code} {r.text}")
+
+
+def reconcile_device(client, device, params, check_mode=False):
+    device_id = params['device_name']
+
+    if params['state'] == 'absent':
+        if not device:
+            return dict(name=device_id, changed=False, msg="Device already absent.")
+        if not check_mode:
+            delete_device(client, device_id)
+        return dict(name=device_id, changed=True, msg="Device deleted.")
+
+    payload = build_device_payload(params)
+    if not device:
+        if not check_mode:
+            create_device(client, payload)
+        return dict(name=device_id, changed=True, msg="Device created.")
+
+    changes = device_changes(device, payload)
+    sub_changes = device_sub_resource_changes(device, payload)
+    if not changes and not sub_changes:
+        return dict(name=device_id, changed=False, msg="Device already up to date.")
+    if not check_mode:
+        if changes:
+            update_device(client, device_id, changes)
+        for field, (create, update, delete) in sub_changes.items():
+            update_sub_resources(client, device_id, field, create, update, delete)
+    return dict(name=device_id, changed=True, msg="Device updated.")
@@ -0,0 +1,76 @@
+import hashlib
+import json
+from collections import Counter
+
+
+def _is_scalar(value):
+    return not isinstance(value, (dict, list))
+
+
+def matches(current, wanted, key=None):
+    # Whether the object returned by the API already holds the wanted value.
+    # Dicts only need the wanted (non None) fields, the server may return
+    # more. Lists are compared regardless of order; lists of dicts are matched
+    # by their identity field when key is given.
+    if isinstance(wanted, dict):
+        if not isinstance(current, dict):
+            return False
+        return all(matches(current.get(k), v) for k, v in wanted.items() if v is not None)
+
+    if isinstance(wanted, list):
+        if not isinstance(current, list) or len(current) != len(wanted):
+            return False
+        if key is not None:
+            indexed = {item.get(key): item for item in current if isinstance(item, dict)}
+            return len(indexed) == len(wanted) and all(
+                isinstance(item, dict) and matches(indexed.get(item.get(key)), item) for item in wanted
+            )
+        if all(_is_scalar(v) for v in wanted) and all(_is_scalar(v) for v in current):
+            return Counter(wanted) == Counter(current)
+        remaining = list(current)
+        for item in wanted:
+            for i, candidate in enumerate(remaining):
+                if matches(candidate, item):
+                    del remaining[i]
+                    break
+            else:
+                return False
+        return True
+
+    return current == wanted
+
+
+def compute_changes(existing, desired, list_keys=None, defaults=None, ignore=()):
+    # Minimal update payload: the desired top-level fields whose value differs
+    # from the existing object. Fields missing from the existing object take
+    # their server default, if any.
+    list_keys = list_keys or {}
+    defaults = defaults or {}
+    changes = {}
+    for field, value in desired.items():
+        if field in ignore or value is None:
+            continue
+        current = existing.get(field, defaults.get(field))
+        if not matches(current, value, list_keys.get(field)):
+            changes[field] = value
+    return changes
+
+
+def canonical(value):
+    # The value with what matches() disregards taken out: None fields are
+    # dropped and lists are sorted, so two objects that match each other
+    # both ways have the same canonical form.
+    if isinstance(value, dict):
+        return {k: canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        items = [canonical(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    return value
+
+
+def fingerprint(obj):
+    # Digest of the canonical form of an object, None when it does not exist.
+    if obj is None:
+        return None
+    data = json.dumps(canonical(obj), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
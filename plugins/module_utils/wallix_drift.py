@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_parallel
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import fingerprint
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_export import EXPORT_KEYS, EXPORT_PATHS
+
+
+STORE_VERSION = 1
+
+
+def object_path(name, key):
+    if name == 'device_accounts':
+        device, domain, account = key.split('/')
+        return api_path('devices', device, 'localdomains', domain, 'accounts', account)
+    return api_path(EXPORT_PATHS[name].split('/')[-1], key)
+
+
+class FingerprintStore:
+    # The fingerprint of every object seen by the last run, per type, with
+    # the fields they were computed from.
+    def __init__(self, path, api_url):
+        self.path = os.path.expanduser(path)
+        self.api_url = api_url
+        self.resources = {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            raise WallixError(f"Failed to read fingerprints {path}: {e}")
+        if data.get('version') != STORE_VERSION:
+            raise WallixError(f"Unsupported fingerprints version {data.get('version')} in {path}")
+        if data.get('api_url') != api_url:
+            raise WallixError(f"{path} holds the fingerprints of {data.get('api_url')}, not {api_url}")
+        self.resources = data['resources']
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fingerprints-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(version=STORE_VERSION, api_url=self.api_url, resources=self.resources), f,
+                      separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+
+def scan(client, name, fields=None, page_size=500):
+    # Fingerprint of each object of a type, keyed by its key fields. With
+    # fields, only those are listed and fingerprinted.
+    keys = EXPORT_KEYS[name]
+    params = {}
+    if fields:
+        params['fields'] = ','.join(dict.fromkeys(keys + tuple(fields)))
+    return {'/'.join(str(obj.get(key)) for key in keys): fingerprint(obj)
+            for obj in client.iter_items(EXPORT_PATHS[name], params=params, page_size=page_size)}
+
+
+def detect_drift(client, store, names, fields=None, page_size=500, workers=6):
+    # Compares the listings with the store and records them in it. A type
+    # missing from the store, or stored with other fields, is only recorded.
+    fields = fields or {}
+
+    def fetch(name):
+        return scan(client, name, fields.get(name), page_size=page_size)
+
+    drift = {}
+    initialized = []
+    for name, (current, error) in zip(names, run_parallel(fetch, names, workers)):
+        if error:
+            raise WallixError(error)
+        previous = store.resources.get(name)
+        store.resources[name] = dict(fields=fields.get(name), objects=current)
+        if previous is None or previous['fields'] != fields.get(name):
+            initialized.append(name)
+            continue
+        previous = previous['objects']
+        drift[name] = dict(
+            added=sorted(key for key in current if key not in previous),
+            removed=sorted(key for key in previous if key not in current),
+            modified=sorted(key for key, value in current.items() if key in previous and previous[key] != value),
+        )
+    return drift, initialized
+
+
+def fetch_changed(client, drift, workers=8):
+    # The whole body of the added and modified objects, None for those
+    # deleted since they were listed.
+    tasks = [(name, key) for name, changes in drift.items() for key in changes['added'] + changes['modified']]
+
+    def get(task):
+        path = object_path(*task)
+        r = client.get(path)
+        if r.status_code == 404:
+            return None
+        if r.status_code != 200:
+            raise WallixError(f"Failed to get {path}: {r.status_code} {r.text}")
+        return r.json()
+
+    objects = {name: {} for name in drift}
+    for (name, key), (obj, error) in zip(tasks, run_parallel(get, tasks, workers)):
+        if error:
+            raise WallixError(error)
+        objects[name][key] = obj
+    return objects
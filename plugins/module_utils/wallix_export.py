@@ -0,0 +1,206 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+from itertools import islice
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_authorizations import create_authorization
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_parallel
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_device_accounts import create_account
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_devices import create_device
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_state import resource_levels
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_target_groups import create_target_group
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_user_groups import create_group
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_users import create_user
+
+
+MANIFEST = 'manifest.json'
+
+# Listing of each exported type; device accounts come with their device and
+# domain fields from the bastion-wide account listing.
+EXPORT_PATHS = {
+    'users': "/api/users",
+    'user_groups': "/api/usergroups",
+    'devices': "/api/devices",
+    'device_accounts': "/api/accounts",
+    'target_groups': "/api/targetgroups",
+    'authorizations': "/api/authorizations",
+}
+
+# Fields identifying an object of each type, fetched alone to skip the
+# objects that already exist when restoring.
+EXPORT_KEYS = {
+    'users': ('user_name',),
+    'user_groups': ('group_name',),
+    'devices': ('device_name',),
+    'device_accounts': ('device', 'domain', 'account_name'),
+    'target_groups': ('group_name',),
+    'authorizations': ('authorization_name',),
+}
+
+
+def _create_user(client, user):
+    # Memberships are restored with the groups, which are created after the
+    # users they hold.
+    create_user(client, {k: v for k, v in user.items() if k != 'groups'})
+
+
+def _create_account(client, account):
+    payload = {k: v for k, v in account.items() if k not in ('device', 'domain')}
+    create_account(client, account['device'], account['domain'], payload)
+
+
+RESTORERS = {
+    'users': _create_user,
+    'user_groups': create_group,
+    'devices': create_device,
+    'device_accounts': _create_account,
+    'target_groups': create_target_group,
+    'authorizations': create_authorization,
+}
+
+
+def export_file(directory, name):
+    return os.path.join(directory, f"{name}.ndjson.gz")
+
+
+class Export:
+    # An export directory: one gzipped NDJSON file per type, and a manifest
+    # holding for each type the listing offset and the file size reached at
+    # the last complete page. Every page is written as its own gzip member,
+    # so an interrupted export resumes by cutting the file back to that size
+    # and listing again from that offset.
+    def __init__(self, directory, api_url, resume=True):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.manifest = None
+        if resume:
+            try:
+                with open(os.path.join(directory, MANIFEST)) as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError):
+                pass
+            if self.manifest and self.manifest.get('api_url') != api_url:
+                raise WallixError(f"{directory} holds an export of {self.manifest.get('api_url')}, not {api_url}")
+        self.resumed = self.manifest is not None
+        if not self.resumed:
+            self.manifest = dict(api_url=api_url, resources={})
+            for name in EXPORT_PATHS:
+                try:
+                    os.unlink(export_file(directory, name))
+                except OSError:
+                    pass
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _save(self):
+        with self.lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.manifest-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.manifest, f, indent=1)
+            os.replace(tmp_path, os.path.join(self.directory, MANIFEST))
+
+    def export(self, client, name, page_size=500):
+        with self.lock:
+            state = self.manifest['resources'].setdefault(name, dict(offset=0, size=0, done=False))
+        if state['done']:
+            return state
+
+        path = export_file(self.directory, name)
+        with open(path, 'ab') as raw:
+            raw.truncate(state['size'])
+            raw.seek(state['size'])
+            items = client.iter_items(EXPORT_PATHS[name], page_size=page_size, offset=state['offset'])
+            while True:
+                page = list(islice(items, page_size))
+                if page:
+                    with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+                        for item in page:
+                            f.write(json.dumps(item, separators=(',', ':')).encode('utf-8'))
+                            f.write(b'\n')
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                with self.lock:
+                    state.update(offset=state['offset'] + len(page), size=raw.tell(), done=len(page) < page_size)
+                self._save()
+                if state['done']:
+                    return state
+
+
+def export_resources(client, directory, names, page_size=500, workers=8, resume=True):
+    # Exports the types concurrently, each one page at a time. Returns the
+    # export and the error of each type that failed.
+    export = Export(directory, client.api_url, resume=resume)
+    outcomes = run_parallel(lambda name: export.export(client, name, page_size=page_size), names, workers)
+    errors = {name: error for name, (state, error) in zip(names, outcomes) if error}
+    return export, errors
+
+
+def iter_exported(directory, name):
+    path = export_file(directory, name)
+    if not os.path.exists(path):
+        return
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def existing_keys(client, name, page_size=500):
+    fields = EXPORT_KEYS[name]
+    params = dict(fields=','.join(fields))
+    return {tuple(obj.get(field) for field in fields)
+            for obj in client.iter_items(EXPORT_PATHS[name], params=params, page_size=page_size)}
+
+
+def restore_resources(client, directory, names, workers=8, page_size=500, check_mode=False, max_errors=20):
+    # Creates the exported objects missing from the bastion by dependency
+    # level, the objects of a level concurrently. Only the keys of the
+    # existing objects are listed, and the files are read in batches, so
+    # memory does not grow with the size of the objects.
+    results = {name: dict(created=0, skipped=0, failed=0, errors=[]) for name in names}
+    batch_size = max(1, workers) * 64
+
+    for level in resource_levels():
+        level = [name for name in level if name in names]
+        keys = {}
+        for name, (listing, error) in zip(level, run_parallel(lambda name: existing_keys(client, name, page_size),
+                                                              level, workers)):
+            if error:
+                raise WallixError(error)
+            keys[name] = listing
+
+        def missing(name):
+            fields = EXPORT_KEYS[name]
+            for obj in iter_exported(directory, name):
+                if tuple(obj.get(field) for field in fields) in keys[name]:
+                    results[name]['skipped'] += 1
+                else:
+                    yield name, obj
+
+        objects = (task for name in level for task in missing(name))
+
+        def create(task):
+            name, obj = task
+            if not check_mode:
+                RESTORERS[name](client, obj)
+
+        while True:
+            batch = list(islice(objects, batch_size))
+            if not batch:
+                break
+            for (name, obj), (_, error) in zip(batch, run_parallel(create, batch, workers)):
+                result = results[name]
+                if error:
+                    result['failed'] += 1
+                    if len(result['errors']) < max_errors:
+                        result['errors'].append(error)
+                else:
+                    result['created'] += 1
+
+        # Later levels reference the objects of this one.
+        if any(results[name]['failed'] for name in level):
+            break
+
+    return results
@@ -0,0 +1,204 @@
+import base64
+import http.client
+import json
+import threading
+from http.cookies import CookieError, SimpleCookie
+from urllib.parse import urlencode, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+
+# Failures of a kept-alive connection the server closed while it was idle:
+# the request never reached it and can be sent again on a new connection.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class TransportError(Exception):
+    pass
+
+
+class InvalidRequestError(Exception):
+    # A request http.client refuses to send, such as a URL with spaces or
+    # characters outside ASCII: sending it again cannot succeed.
+    pass
+
+
+class Response:
+    # The parts of a requests.Response the collection uses, over an
+    # http.client response whose connection goes back to the pool once the
+    # body has been read.
+    def __init__(self, url, status_code, headers, raw=None, release=None, content=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.bytes_read = 0
+        self._raw = raw
+        self._release = release
+        self._content = content
+
+    def iter_content(self, chunk_size=65536):
+        if self._content is not None:
+            yield self._content
+            return
+        try:
+            while True:
+                chunk = self._raw.read(chunk_size)
+                if not chunk:
+                    break
+                self.bytes_read += len(chunk)
+                yield chunk
+            # http.client ends a body the server closed before its
+            # Content-Length like a complete one.
+            if self._raw.length:
+                raise http.client.IncompleteRead(b'', self._raw.length)
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise TransportError(f"Reading {self.url} failed: {e}")
+        self._finish(reuse=True)
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b''.join(self.iter_content())
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def _finish(self, reuse):
+        release, self._release = self._release, None
+        if release is not None:
+            release(reuse and not self._raw.will_close)
+
+    def close(self):
+        # A body left unread makes the connection unusable for the next request.
+        self._finish(reuse=self._raw is not None and self._raw.isclosed())
+
+
+class HTTPSession:
+    # Keep-alive connections to a single server, shared by the threads of a
+    # bulk module: each request takes an idle connection or opens one, and
+    # gives it back once its response has been read.
+    def __init__(self, base_url, validate_certs=True, timeout=30, pool_size=10):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.auth = None
+        self.cookies = {}
+        self.lock = threading.Lock()
+        self.idle = []
+        self.ssl_context = None
+        # The proxy of the environment (https_proxy, http_proxy, no_proxy),
+        # as urllib and Ansible's URL layer would use it.
+        self.proxy = None
+        self.proxy_headers = {}
+        proxy = getproxies().get(self.scheme)
+        if proxy and not proxy_bypass(parts.netloc):
+            proxy = urlsplit(proxy if '://' in proxy else f"http://{proxy}")
+            self.proxy = (proxy.hostname, proxy.port or 80)
+            if proxy.username:
+                token = base64.b64encode(f"{proxy.username}:{proxy.password or ''}".encode('utf-8')).decode('ascii')
+                self.proxy_headers['Proxy-Authorization'] = f"Basic {token}"
+
+    def _connect(self):
+        if self.scheme != 'https':
+            if self.proxy:
+                return http.client.HTTPConnection(*self.proxy, timeout=self.timeout)
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        if self.ssl_context is None:
+            import ssl
+            context = ssl.create_default_context()
+            if not self.validate_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self.ssl_context = context
+        if self.proxy:
+            conn = http.client.HTTPSConnection(*self.proxy, timeout=self.timeout, context=self.ssl_context)
+            conn.set_tunnel(self.host, self.port, headers=self.proxy_headers)
+            return conn
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.ssl_context)
+
+    def _release(self, conn, reuse):
+        with self.lock:
+            if reuse and len(self.idle) < self.pool_size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def _headers(self, headers):
+        headers = dict(headers or {})
+        if self.auth:
+            token = base64.b64encode(f"{self.auth[0]}:{self.auth[1]}".encode('utf-8')).decode('ascii')
+            headers['Authorization'] = f"Basic {token}"
+        with self.lock:
+            cookies = '; '.join(f"{name}={value}" for name, value in self.cookies.items())
+        if cookies:
+            headers['Cookie'] = cookies
+        return headers
+
+    def _store_cookies(self, headers):
+        for header in headers.get_all('Set-Cookie') or []:
+            try:
+                cookie = SimpleCookie(header)
+            except CookieError:
+                continue
+            with self.lock:
+                for name, morsel in cookie.items():
+                    if morsel.value and morsel['max-age'] != '0':
+                        self.cookies[name] = morsel.value
+                    else:
+                        self.cookies.pop(name, None)
+
+    def request(self, method, url, headers=None, data=None, params=None, stream=False):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        body = data.encode('utf-8') if isinstance(data, str) else data
+        r = self._pooled_request(method, url, self._headers(headers), body)
+        self._store_cookies(r.headers)
+        if not stream:
+            r.content
+        return r
+
+    def _pooled_request(self, method, url, headers, body):
+        if self.proxy and self.scheme != 'https':
+            # Plain HTTP goes through the proxy with absolute URLs.
+            target = url
+            headers.update(self.proxy_headers)
+        else:
+            parts = urlsplit(url)
+            target = parts.path + (f"?{parts.query}" if parts.query else '')
+        while True:
+            with self.lock:
+                conn = self.idle.pop() if self.idle else None
+            reused = conn is not None
+            conn = conn or self._connect()
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                raw = conn.getresponse()
+            except (http.client.InvalidURL, UnicodeError) as e:
+                conn.close()
+                raise InvalidRequestError(str(e))
+            except STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if reused:
+                    continue
+                raise TransportError(str(e))
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise TransportError(str(e))
+            return Response(url, raw.status, raw.headers, raw=raw,
+                            release=lambda reuse, conn=conn: self._release(conn, reuse))
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
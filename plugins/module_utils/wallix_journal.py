@@ -0,0 +1,175 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_parallel
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError
+
+
+def _key(key):
+    return json.dumps(key, separators=(',', ':'))
+
+
+class Journal:
+    # The outcome of every operation of a bulk run, appended to a file as it
+    # completes. A run started again with the same items (same digest) skips
+    # the items already applied; with other items, the journal starts over.
+    # Failed operations are not recorded, so they are tried again.
+    def __init__(self, path, digest):
+        self.path = os.path.expanduser(path)
+        self.lock = threading.Lock()
+        self.done = {}
+        try:
+            with open(self.path) as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('digest') == digest:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # Last line cut short by the interruption.
+                            break
+                        self.done[entry['key']] = entry['result']
+        except (OSError, ValueError):
+            pass
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.done:
+            self.file = open(self.path, 'a')
+        else:
+            self.file = open(self.path, 'w')
+            self.file.write(json.dumps(dict(digest=digest, started=time.time())) + '\n')
+            self.file.flush()
+
+    def get(self, key):
+        return self.done.get(_key(key))
+
+    def record(self, key, result):
+        line = json.dumps(dict(key=_key(key), result=result)) + '\n'
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def close(self, remove=False):
+        self.file.close()
+        if remove:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+def open_journal(module, client, items):
+    # The journal of this module run on this bastion, or None without
+    # checkpoint or in check mode.
+    path = module.params['checkpoint']
+    if not path or module.check_mode:
+        return None
+    if module.params['api_urls']:
+        path = f"{path}.{hashlib.sha256(client.api_url.encode('utf-8')).hexdigest()[:12]}"
+    data = json.dumps(dict(module=module._name, api_url=client.api_url, items=items), sort_keys=True, default=str)
+    return Journal(path, hashlib.sha256(data.encode('utf-8')).hexdigest())
+
+
+def _async_job_path():
+    # The results file async_status reads, when the module runs under
+    # async: named after the job id the async wrapper, our parent process,
+    # was started with.
+    async_dir = os.environ.get('ANSIBLE_ASYNC_DIR')
+    if not async_dir:
+        return None
+    try:
+        with open(f"/proc/{os.getppid()}/cmdline", 'rb') as f:
+            args = f.read().decode('utf-8', 'replace').split('\0')
+    except OSError:
+        return None
+    for i, arg in enumerate(args[:-1]):
+        if 'async_wrapper' in os.path.basename(arg):
+            paths = glob.glob(os.path.join(os.path.expanduser(async_dir), f"{glob.escape(args[i + 1])}.*"))
+            paths = [path for path in paths if not path.endswith(('.tmp', '.progress'))]
+            return paths[0] if len(paths) == 1 else None
+    return None
+
+
+class AsyncProgress:
+    # Counts of the items done and failed, published at most every interval
+    # seconds in the async job results file, so async_status returns them
+    # while the module is still running.
+    def __init__(self, interval=1.0):
+        self.lock = threading.Lock()
+        self.interval = interval
+        self.total = self.done = self.failed = self.resumed = 0
+        self.published = 0
+        self.job_path = _async_job_path()
+        self.job = None
+        if self.job_path:
+            try:
+                with open(self.job_path) as f:
+                    self.job = json.load(f)
+            except (OSError, ValueError):
+                self.job_path = None
+
+    def add(self, total, resumed=0):
+        with self.lock:
+            self.total += total
+            self.done += resumed
+            self.resumed += resumed
+        self.publish()
+
+    def advance(self, failed=False):
+        with self.lock:
+            self.done += 1
+            self.failed += failed
+        self.publish()
+
+    def result(self):
+        return dict(total=self.total, done=self.done, failed=self.failed, resumed=self.resumed)
+
+    def publish(self):
+        if not self.job_path or time.time() - self.published < self.interval:
+            return
+        with self.lock:
+            self.published = time.time()
+            job = dict(self.job, started=True, finished=False, progress=self.result())
+            tmp_path = f"{self.job_path}.progress"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(job, f)
+                os.replace(tmp_path, self.job_path)
+            except OSError:
+                self.job_path = None
+
+
+def run_journaled(func, items, workers, item_key, journal=None, progress=None, key=None, per_key=0):
+    # run_parallel() for the items missing from the journal, recording each
+    # one that succeeds; the others get their journaled result.
+    results = [None] * len(items)
+    pending = []
+    for i, item in enumerate(items):
+        result = journal.get(item_key(item)) if journal else None
+        if result is None:
+            pending.append(i)
+        else:
+            results[i] = (result, None)
+    if progress:
+        progress.add(len(items), resumed=len(items) - len(pending))
+
+    def call(item):
+        try:
+            result = func(item)
+        except WallixError:
+            if progress:
+                progress.advance(failed=True)
+            raise
+        if journal:
+            journal.record(item_key(item), result)
+        if progress:
+            progress.advance()
+        return result
+
+    outcomes = run_parallel(call, [items[i] for i in pending], workers, key=key, per_key=per_key)
+    for i, outcome in zip(pending, outcomes):
+        results[i] = outcome
+    return results
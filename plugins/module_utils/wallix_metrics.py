@@ -0,0 +1,94 @@
+import threading
+from urllib.parse import urlparse
+
+
+# Upper bounds, in milliseconds, of the request latency histogram buckets.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def endpoint_of(url):
+    # Path template of a request, so the metrics of /api/users/jdoe and
+    # /api/users/olduser add up: API collections are kept, object ids are
+    # replaced with {id}.
+    parts = urlparse(url).path.strip('/').split('/')
+    if parts[:1] == ['api']:
+        parts = ['api'] + [part if i % 2 == 0 else '{id}' for i, part in enumerate(parts[1:])]
+    return '/' + '/'.join(parts)
+
+
+def latency_bucket(ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return str(bound)
+    return '+Inf'
+
+
+class RequestMetrics:
+    # Counters of the requests sent by one client, returned by the modules as
+    # wallix_metrics and summed over the play by the wallix_metrics callback.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.latencies = []
+
+    def _endpoint(self, method, url):
+        name = f"{method} {endpoint_of(url)}"
+        if name not in self.endpoints:
+            self.endpoints[name] = dict(
+                requests=0, retries=0, statuses={}, elapsed_s=0.0, max_ms=0.0,
+                bytes_sent=0, bytes_received=0, buckets={},
+            )
+        return self.endpoints[name]
+
+    def record(self, method, url, status, elapsed, bytes_sent=0, bytes_received=0):
+        # status is the HTTP status code, or 'error' when no answer came back.
+        ms = elapsed * 1000
+        with self.lock:
+            endpoint = self._endpoint(method, url)
+            endpoint['requests'] += 1
+            endpoint['statuses'][str(status)] = endpoint['statuses'].get(str(status), 0) + 1
+            endpoint['elapsed_s'] += elapsed
+            endpoint['max_ms'] = max(endpoint['max_ms'], ms)
+            endpoint['bytes_sent'] += bytes_sent
+            endpoint['bytes_received'] += bytes_received
+            bucket = latency_bucket(ms)
+            endpoint['buckets'][bucket] = endpoint['buckets'].get(bucket, 0) + 1
+            self.latencies.append(ms)
+
+    def record_received(self, method, url, bytes_received):
+        # Streamed bodies are only counted once they have been read.
+        with self.lock:
+            self._endpoint(method, url)['bytes_received'] += bytes_received
+
+    def record_retry(self, method, url):
+        with self.lock:
+            self._endpoint(method, url)['retries'] += 1
+
+    def result(self):
+        with self.lock:
+            endpoints = {
+                name: dict(endpoint, elapsed_s=round(endpoint['elapsed_s'], 6), max_ms=round(endpoint['max_ms'], 3),
+                           statuses=dict(endpoint['statuses']), buckets=dict(endpoint['buckets']))
+                for name, endpoint in self.endpoints.items()
+            }
+            latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3)
+
+        statuses = {}
+        for endpoint in endpoints.values():
+            for status, count in endpoint['statuses'].items():
+                statuses[status] = statuses.get(status, 0) + count
+        return dict(
+            requests=sum(endpoint['requests'] for endpoint in endpoints.values()),
+            retries=sum(endpoint['retries'] for endpoint in endpoints.values()),
+            bytes_sent=sum(endpoint['bytes_sent'] for endpoint in endpoints.values()),
+            bytes_received=sum(endpoint['bytes_received'] for endpoint in endpoints.values()),
+            elapsed_s=round(sum(endpoint['elapsed_s'] for endpoint in endpoints.values()), 6),
+            latency_ms=dict(p50=percentile(0.50), p99=percentile(0.99), max=percentile(1.0)),
+            statuses=statuses,
+            endpoints=endpoints,
+        )
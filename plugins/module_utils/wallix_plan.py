@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import time
+from http.client import HTTPMessage
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import fingerprint
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_http import Response
+
+
+PLAN_VERSION = 2
+
+
+class PlanRecorder:
+    # Stands in for the client while a reconciler runs: the writes it would
+    # send are recorded instead, and answered as the API answers a success.
+    def __init__(self, api_url):
+        self.api_url = api_url
+        self.operations = []
+
+    def request(self, method, path, payload=None, params=None):
+        self.operations.append(dict(method=method, path=path, payload=payload, params=params))
+        return Response(f"{self.api_url}{path}", 204, HTTPMessage(), content=b'')
+
+    def get(self, path, params=None, stream=False):
+        raise WallixError(f"Cannot plan a change that needs to read {path}")
+
+    def post(self, path, payload):
+        return self.request('POST', path, payload=payload)
+
+    def put(self, path, payload, params=None):
+        return self.request('PUT', path, payload=payload, params=params)
+
+    def delete(self, path):
+        return self.request('DELETE', path)
+
+
+def write_plan(path, plan):
+    # The payloads may hold passwords and credentials: the plan is only
+    # readable by its owner.
+    path = os.path.expanduser(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.plan-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(dict(plan, version=PLAN_VERSION, created=time.time()), f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def read_plan(path, api_url):
+    try:
+        with open(os.path.expanduser(path)) as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        raise WallixError(f"Failed to read plan {path}: {e}")
+    if plan.get('version') != PLAN_VERSION:
+        raise WallixError(f"Unsupported plan version {plan.get('version')} in {path}")
+    if plan.get('api_url') != api_url:
+        raise WallixError(f"Plan {path} was made for {plan.get('api_url')}, not {api_url}")
+    return plan
+
+
+def check_fingerprint(client, operation):
+    # Read the object the operation was planned against and make sure it is
+    # still the one the plan saw, on the bastion itself: a cached copy may
+    # predate the change that should fail the plan.
+    r = client.get(operation['object'], cache=False)
+    if r.status_code == 404:
+        current = None
+    elif r.status_code == 200:
+        current = r.json()
+    else:
+        raise WallixError(f"Failed to get {operation['object']}: {r.status_code} {r.text}")
+    if fingerprint(current) != operation['fingerprint']:
+        raise WallixError(f"{operation['object']} changed since the plan was made.")
+
+
+def apply_operations(client, operations, check_mode=False):
+    # The writes planned against one object, sent one after another in their
+    # recorded order once the object is found unchanged. It is only checked
+    # before the first write: the next ones would see the changes it made.
+    check_fingerprint(client, operations[0])
+    if not check_mode:
+        for operation in operations:
+            r = client.request(operation['method'], operation['path'], payload=operation['payload'],
+                               params=operation['params'])
+            if r.status_code != 204:
+                raise WallixError(f"Failed to {operation['method']} {operation['path']}: {r.status_code} {r.text}")
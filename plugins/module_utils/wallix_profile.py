@@ -0,0 +1,138 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# Frames of the profiler, of tracemalloc and of the import machinery, left
+# out of the allocations.
+ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def short_path(filename):
+    # Paths inside the AnsiballZ payload change on every run.
+    for marker in ('/ansible_collections/', '/ansible/'):
+        i = filename.find(marker)
+        if i >= 0:
+            return filename[i + 1:]
+    return filename
+
+
+class Profiler:
+    # cProfile and tracemalloc over the run of a module. Before Python 3.12,
+    # cProfile only sees the thread it was enabled in: each worker thread
+    # gets its own profile, merged with the others at the end. The memory is
+    # sampled in the background, and the allocations are those alive at the
+    # highest sample.
+    def __init__(self, directory, name, interval=0.2, top=15):
+        self.directory = directory
+        self.name = name
+        self.interval = interval
+        self.top = top
+        self.lock = threading.Lock()
+        self.profiles = []
+        self.snapshot = None
+        self.snapshot_size = 0
+        self.stopped = threading.Event()
+        self.result = None
+
+    def start(self):
+        tracemalloc.start()
+        self.started = time.perf_counter()
+        self.sampler = threading.Thread(target=self._sample, daemon=True)
+        self.sampler.start()
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        profile.enable()
+
+    def _profile_thread(self, frame, event, arg):
+        # First event of a new thread: hand it over to a profile of its own.
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            self._snapshot(min_growth=1.1)
+
+    def _snapshot(self, min_growth):
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self.snapshot_size * min_growth:
+            snapshot = tracemalloc.take_snapshot().filter_traces(ALLOCATION_FILTERS)
+            with self.lock:
+                if current > self.snapshot_size:
+                    self.snapshot, self.snapshot_size = snapshot, current
+
+    def stop(self):
+        # The wallix_profile block, once the files are written.
+        if self.result is not None:
+            return self.result
+        threading.setprofile(None)
+        self.profiles[0].disable()
+        elapsed = time.perf_counter() - self.started
+        self.stopped.set()
+        self.sampler.join()
+        self._snapshot(min_growth=1.0)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        with self.lock:
+            stats = pstats.Stats(*self.profiles)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        allocations = self.snapshot.statistics('lineno')[:self.top] if self.snapshot else []
+        self.result = dict(
+            elapsed_s=round(elapsed, 6),
+            peak_memory_kb=round(peak / 1024, 1),
+            functions=[dict(function=f"{short_path(filename)}:{line}({name})", calls=calls,
+                            tottime_s=round(tottime, 6), cumtime_s=round(cumtime, 6))
+                       for (filename, line, name), (_, calls, tottime, cumtime, _) in functions],
+            allocations=[dict(location=f"{short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                              size_kb=round(stat.size / 1024, 1), count=stat.count)
+                         for stat in allocations],
+        )
+        try:
+            self.result.update(self._write(stats, allocations))
+        except OSError as e:
+            self.result['error'] = f"Failed to write the profile to {self.directory}: {e}"
+        return self.result
+
+    def _write(self, stats, allocations):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        stats.dump_stats(f"{base}.prof")
+
+        report = io.StringIO()
+        report.write(f"{self.name}: {self.result['elapsed_s']}s, peak memory {self.result['peak_memory_kb']} KiB\n\n")
+        stats.stream = report
+        stats.sort_stats('cumulative').print_stats(40)
+        report.write(f"Allocations alive at the highest memory sample ({round(self.snapshot_size / 1024, 1)} KiB):\n")
+        for stat in allocations:
+            frame = stat.traceback[0]
+            report.write(f"{stat.size / 1024:12.1f} KiB {stat.count:9d} blocks  {short_path(frame.filename)}:{frame.lineno}\n")
+        with open(f"{base}.txt", 'w') as f:
+            f.write(report.getvalue())
+        return dict(stats=f"{base}.prof", report=f"{base}.txt")
+
+
+def profile_module(module, directory):
+    # Profile the rest of the run and add wallix_profile to whatever result
+    # the module ends with, success or failure.
+    profiler = Profiler(os.path.expanduser(directory), module._name.split('.')[-1])
+    module._wallix_profiler = profiler
+    profiler.start()
+    exit_json, fail_json = module.exit_json, module.fail_json
+    module.exit_json = lambda **result: exit_json(wallix_profile=profiler.stop(), **result)
+    module.fail_json = lambda msg, **result: fail_json(msg=msg, wallix_profile=profiler.stop(), **result)
@@ -0,0 +1,274 @@
+import fnmatch
+
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_authorizations import (
+    authorization_options, list_authorizations, reconcile_authorization,
+)
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_parallel
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_device_accounts import (
+    device_account_options, list_device_accounts, reconcile_account,
+)
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_devices import device_options, list_devices, reconcile_device
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import fingerprint
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_journal import run_journaled
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_plan import PlanRecorder, apply_operations
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_target_groups import (
+    list_target_groups, reconcile_target_group, target_group_options,
+)
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_user_groups import (
+    list_groups, reconcile_user_group, user_group_options,
+)
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_users import list_users, reconcile_user, user_options
+
+
+# Each resource type with the types it depends on, how to list the existing
+# objects once, how to find a desired object in that listing, the API path of
+# that object, the item deleting an object of that listing and how to
+# reconcile it.
+RESOURCES = {
+    'users': dict(
+        depends_on=[],
+        options=user_options,
+        list=lambda client, items, page_size: list_users(client, page_size=page_size),
+        key=lambda item: item['name'],
+        path=lambda item: api_path('users', item['name']),
+        absent=lambda key: dict(name=key, state='absent'),
+        reconcile=reconcile_user,
+    ),
+    'user_groups': dict(
+        depends_on=['users'],
+        options=user_group_options,
+        list=lambda client, items, page_size: list_groups(client, page_size=page_size),
+        key=lambda item: item['group_name'],
+        path=lambda item: api_path('usergroups', item['group_name']),
+        absent=lambda key: dict(group_name=key, state='absent'),
+        reconcile=reconcile_user_group,
+    ),
+    'devices': dict(
+        depends_on=[],
+        options=device_options,
+        list=lambda client, items, page_size: list_devices(client, page_size=page_size),
+        key=lambda item: item['device_name'],
+        path=lambda item: api_path('devices', item['device_name']),
+        absent=lambda key: dict(device_name=key, state='absent'),
+        reconcile=reconcile_device,
+    ),
+    'device_accounts': dict(
+        depends_on=['devices'],
+        options=device_account_options,
+        list=lambda client, items, page_size: list_device_accounts(client, items, page_size=page_size),
+        key=lambda item: (item['device_id'], item['domain_id'], item['account_name']),
+        path=lambda item: api_path('devices', item['device_id'], 'localdomains', item['domain_id'],
+                                   'accounts', item['account_name']),
+        absent=lambda key: dict(device_id=key[0], domain_id=key[1], account_name=key[2], state='absent'),
+        reconcile=reconcile_account,
+    ),
+    'target_groups': dict(
+        depends_on=['devices', 'device_accounts'],
+        options=target_group_options,
+        list=lambda client, items, page_size: list_target_groups(client, page_size=page_size),
+        key=lambda item: item['group_name'],
+        path=lambda item: api_path('targetgroups', item['group_name']),
+        absent=lambda key: dict(group_name=key, state='absent'),
+        reconcile=reconcile_target_group,
+    ),
+    'authorizations': dict(
+        depends_on=['user_groups', 'target_groups'],
+        options=authorization_options,
+        list=lambda client, items, page_size: list_authorizations(client, page_size=page_size),
+        key=lambda item: item['authorization_name'],
+        path=lambda item: api_path('authorizations', item['authorization_name']),
+        absent=lambda key: dict(authorization_name=key, state='absent'),
+        reconcile=reconcile_authorization,
+    ),
+}
+
+
+def resource_levels():
+    # Topological levels of RESOURCES: every type only depends on types of
+    # the previous levels, so the types of one level can be applied together.
+    levels = []
+    done = set()
+    remaining = dict(RESOURCES)
+    while remaining:
+        level = sorted(name for name, spec in remaining.items() if set(spec['depends_on']) <= done)
+        if not level:
+            raise ValueError(f"Dependency cycle between {', '.join(sorted(remaining))}")
+        levels.append(level)
+        done.update(level)
+        for name in level:
+            del remaining[name]
+    return levels
+
+
+def list_existing(client, desired, workers=8, page_size=500, also=()):
+    # The listing of each type of desired, and of each type in also even
+    # without desired objects.
+    types = [name for name in RESOURCES if desired.get(name) or name in also]
+
+    def fetch(name):
+        return RESOURCES[name]['list'](client, desired.get(name) or [], page_size)
+
+    existing = {}
+    for name, (listing, error) in zip(types, run_parallel(fetch, types, workers)):
+        if error:
+            raise WallixError(error)
+        existing[name] = listing
+    return existing
+
+
+def state_waves(desired):
+    # Deletions run first, dependents before their dependencies; then
+    # creations and updates, dependencies before their dependents. Yields the
+    # (type, item) tasks of each wave that has any.
+    levels = resource_levels()
+    waves = [('absent', level) for level in reversed(levels)] + [('present', level) for level in levels]
+    for state, level in waves:
+        tasks = [(name, item) for name in level for item in desired.get(name) or [] if item['state'] == state]
+        if tasks:
+            yield tasks
+
+
+def key_name(key):
+    return '/'.join(key) if isinstance(key, tuple) else key
+
+
+def _failure(name, item, error):
+    return dict(name=key_name(RESOURCES[name]['key'](item)), changed=False, failed=True, msg=error)
+
+
+def _result(item, result):
+    return dict(result, pruned=True) if item.get('pruned') else result
+
+
+def prune_state(existing, desired, types, include=None, exclude=None, limit=0, keep=None):
+    # Adds to desired, as absent, the listed objects of each of types that it
+    # does not hold: a set difference on the listings, so the deletions are
+    # then applied in waves like any other. Only the objects whose name
+    # (device/domain/account for accounts) matches one of the include
+    # patterns, none of the exclude patterns and is not in keep are pruned.
+    # More than limit of them fail the run before anything is changed.
+    include = include or ['*']
+    exclude = exclude or []
+    keep = keep or {}
+    pruned = {}
+    for name in types:
+        spec = RESOURCES[name]
+        wanted = {spec['key'](item) for item in desired.get(name) or []}
+        wanted.update(keep.get(name, ()))
+        keys = sorted(key for key in existing.get(name, {}) if key not in wanted
+                      and any(fnmatch.fnmatchcase(key_name(key), pattern) for pattern in include)
+                      and not any(fnmatch.fnmatchcase(key_name(key), pattern) for pattern in exclude))
+        if keys:
+            pruned[name] = [dict(spec['absent'](key), pruned=True) for key in keys]
+
+    count = sum(len(items) for items in pruned.values())
+    if limit and count > limit:
+        counts = ', '.join(f"{len(items)} {name}" for name, items in pruned.items())
+        raise WallixError(f"Pruning would delete {count} objects ({counts}), more than the limit of {limit}.")
+    return dict(desired, **{name: list(desired.get(name) or []) + items for name, items in pruned.items()})
+
+
+def apply_state(client, desired, workers=8, page_size=500, check_mode=False, prune=None, journal=None,
+                progress=None):
+    # With prune, the keyword arguments of prune_state(), the unmanaged
+    # objects are deleted too. With a journal, the objects it holds are
+    # neither listed nor applied again, and the others are recorded as they
+    # are applied.
+    def task_key(task):
+        name, item = task
+        return (name, RESOURCES[name]['key'](item))
+
+    pending = {name: [item for item in items if not journal or journal.get(task_key((name, item))) is None]
+               for name, items in desired.items()}
+    existing = list_existing(client, pending, workers=workers, page_size=page_size,
+                             also=prune['types'] if prune else ())
+    if prune:
+        desired = prune_state(existing, desired, **prune)
+    results = {name: [] for name in RESOURCES if desired.get(name)}
+    failed = 0
+
+    for tasks in state_waves(desired):
+        def apply(task):
+            name, item = task
+            spec = RESOURCES[name]
+            return spec['reconcile'](client, existing[name].get(spec['key'](item)), item, check_mode=check_mode)
+
+        outcomes = run_journaled(apply, tasks, workers, task_key, journal, progress)
+        for (name, item), (result, error) in zip(tasks, outcomes):
+            if error:
+                failed += 1
+                result = _failure(name, item, error)
+            results[name].append(_result(item, result))
+
+        # Later waves depend on this one, do not apply them on top of a failure.
+        if failed:
+            break
+
+    return results, failed
+
+
+def plan_state(client, desired, workers=8, page_size=500, prune=None):
+    # Reconcile every object against the listings as a real run would, but
+    # record the writes instead of sending them, each with the fingerprint of
+    # the object it was computed from.
+    existing = list_existing(client, desired, workers=workers, page_size=page_size,
+                             also=prune['types'] if prune else ())
+    if prune:
+        desired = prune_state(existing, desired, **prune)
+    results = {name: [] for name in RESOURCES if desired.get(name)}
+    operations = []
+    failed = 0
+
+    for wave, tasks in enumerate(state_waves(desired)):
+        for name, item in tasks:
+            spec = RESOURCES[name]
+            current = existing[name].get(spec['key'](item))
+            recorder = PlanRecorder(client.api_url)
+            try:
+                result = spec['reconcile'](recorder, current, item)
+            except WallixError as e:
+                failed += 1
+                result = _failure(name, item, str(e))
+            results[name].append(_result(item, result))
+            for operation in recorder.operations:
+                operations.append(dict(operation, wave=wave, resource=name, name=result['name'], msg=result['msg'],
+                                       object=spec['path'](item), fingerprint=fingerprint(current)))
+
+    return dict(api_url=client.api_url, operations=operations), results, failed
+
+
+def apply_plan(client, plan, workers=8, check_mode=False):
+    # Send the writes of a plan wave by wave, each once the object it was
+    # planned against is found unchanged: only the objects being changed are
+    # read again, not the listings.
+    operations = plan['operations']
+    results = {name: [] for name in RESOURCES if any(op['resource'] == name for op in operations)}
+    failed = 0
+
+    for wave in sorted({op['wave'] for op in operations}):
+        # A device update may take several writes (the device, then its
+        # services and local domains): each object is one task, the objects
+        # of the wave are applied concurrently.
+        objects = {}
+        for operation in operations:
+            if operation['wave'] == wave:
+                objects.setdefault(operation['object'], []).append(operation)
+        batch = list(objects.values())
+
+        def apply(object_operations):
+            apply_operations(client, object_operations, check_mode=check_mode)
+
+        for object_operations, (_, error) in zip(batch, run_parallel(apply, batch, workers)):
+            operation = object_operations[0]
+            if error:
+                failed += 1
+                result = dict(name=operation['name'], changed=False, failed=True, msg=error)
+            else:
+                result = dict(name=operation['name'], changed=True, msg=operation['msg'])
+            results[operation['resource']].append(result)
+
+        if failed:
+            break
+
+    return results, failed
@@ -0,0 +1,158 @@
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import RESOURCE_KEYS, WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import compute_changes, matches
+
+
+# Fields identifying the entries of the lists nested in the session and
+# password_retrieval settings. The other fields of an entry, like
+# domain_type, are compared once it is paired with the current one.
+ENTRY_KEYS = {
+    'session': dict(
+        accounts=('account', 'domain', 'device', 'service'),
+        account_mappings=('device', 'service'),
+        interactive_logins=('device', 'service'),
+        scenario_accounts=('account', 'domain', 'device'),
+    ),
+    'password_retrieval': dict(
+        accounts=('account', 'domain', 'device', 'application'),
+    ),
+}
+
+
+def target_group_options():
+    return dict(
+        group_name=dict(type='str', required=True),
+        description=dict(type='str', required=False),
+        session=dict(type='dict', required=False),
+        password_retrieval=dict(type='dict', required=False, no_log=False),
+        restrictions=dict(type='list', elements='dict', required=False),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+    )
+
+
+def build_target_group_payload(params):
+    payload = {
+        "group_name": params['group_name'],
+        "description": params['description'],
+        "session": params['session'],
+        "password_retrieval": params['password_retrieval'],
+        "restrictions": params['restrictions']
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+def _is_entries(value):
+    return isinstance(value, list) and all(isinstance(entry, dict) for entry in value)
+
+
+def entry_identity(entry, fields):
+    return tuple(entry.get(field) for field in fields)
+
+
+def entry_changes(current, entries, fields):
+    # Entries to add to and remove from the current ones so the list holds
+    # entries, paired by identity in one pass over each list. An entry whose
+    # other fields differ is added again in place of the current one.
+    indexed = {entry_identity(entry, fields): entry for entry in current or []}
+    wanted = set()
+    added = []
+    for entry in entries:
+        key = entry_identity(entry, fields)
+        if key not in wanted:
+            wanted.add(key)
+            if key not in indexed or not matches(indexed[key], entry):
+                added.append(entry)
+    removed = [entry for key, entry in indexed.items() if key not in wanted]
+    return added, removed
+
+
+def target_group_changes(existing, payload):
+    # The nested lists of entries are diffed by identity rather than matched
+    # pairwise, and the new lists keep the current entries in their order.
+    # The API replaces session and password_retrieval as a whole, so the
+    # lists the task does not set are sent back as they are.
+    changes = compute_changes(existing, payload, ignore=('group_name',) + tuple(ENTRY_KEYS))
+    added, removed = [], []
+    for field, keys in ENTRY_KEYS.items():
+        if payload.get(field) is None:
+            continue
+        current = existing.get(field) or {}
+        setting = dict(current)
+        changed = False
+        for name, entries in payload[field].items():
+            if entries is None:
+                continue
+            if name in keys and _is_entries(entries) and _is_entries(current.get(name) or []):
+                fields = keys[name]
+                list_added, list_removed = entry_changes(current.get(name), entries, fields)
+                if list_added or list_removed:
+                    gone = {entry_identity(entry, fields) for entry in list_added + list_removed}
+                    setting[name] = [entry for entry in current.get(name) or []
+                                     if entry_identity(entry, fields) not in gone] + list_added
+                    added += list_added
+                    removed += list_removed
+                    changed = True
+            elif not matches(current.get(name), entries):
+                setting[name] = entries
+                changed = True
+        if changed:
+            changes[field] = setting
+    return changes, added, removed
+
+
+def get_target_group(client, group_id):
+    r = client.get(api_path('targetgroups', group_id))
+    if r.status_code == 404:
+        return None
+    elif r.status_code != 200:
+        raise WallixError(f"Failed to get target group: {r.status_code} {r.text}")
+    return r.json()
+
+
+def list_target_groups(client, page_size=500):
+    key = RESOURCE_KEYS['targetgroups']
+    return {group[key]: group for group in client.iter_items("/api/targetgroups", page_size=page_size)}
+
+
+def create_target_group(client, payload):
+    r = client.post("/api/targetgroups", payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to create target group: {r.status_code} {r.text}")
+
+
+def update_target_group(client, group_id, payload):
+    r = client.put(api_path('targetgroups', group_id), payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to update target group: {r.status_code} {r.text}")
+
+
+def delete_target_group(client, group_id):
+    r = client.delete(api_path('targetgroups', group_id))
+    if r.status_code != 204:
+        raise WallixError(f"Failed to delete target group: {r.status_code} {r.text}")
+
+
+def reconcile_target_group(client, group, params, check_mode=False):
+    group_id = params['group_name']
+
+    if params['state'] == 'absent':
+        if not group:
+            return dict(name=group_id, changed=False, msg="Target group already absent.")
+        if not check_mode:
+            delete_target_group(client, group_id)
+        return dict(name=group_id, changed=True, msg="Target group deleted.")
+
+    payload = build_target_group_payload(params)
+    if not group:
+        if not check_mode:
+            create_target_group(client, payload)
+        return dict(name=group_id, changed=True, msg="Target group created.")
+
+    changes, added, removed = target_group_changes(group, payload)
+    if not changes:
+        return dict(name=group_id, changed=False, msg="Target group already up to date.")
+    if not check_mode:
+        update_target_group(client, group_id, changes)
+    msg = "Target group updated."
+    if added or removed:
+        msg = f"Target group updated, {len(added)} entries added and {len(removed)} removed."
+    return dict(name=group_id, changed=True, msg=msg)
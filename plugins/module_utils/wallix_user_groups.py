@@ -0,0 +1,120 @@
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import RESOURCE_KEYS, WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import compute_changes
+
+
+def user_group_options():
+    return dict(
+        group_name=dict(type='str', required=True),
+        description=dict(type='str', required=False),
+        timeframes=dict(type='list', elements='str', required=False),
+        users=dict(type='list', elements='str', required=False),
+        append=dict(type='bool', default=False),
+        profile=dict(type='str', required=False),
+        language=dict(type='str', required=False),
+        email_list=dict(type='str', required=False),
+        restrictions=dict(type='list', elements='dict', required=False),
+        state=dict(type='str', choices=['present', 'absent'], default='present'),
+    )
+
+
+def build_user_group_payload(params):
+    payload = {
+        "group_name": params['group_name'],
+        "description": params['description'],
+        "timeframes": params['timeframes'],
+        "users": params['users'],
+        "profile": params['profile'],
+        "language": params['language'],
+        "email_list": params['email_list'],
+        "restrictions": params['restrictions']
+    }
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+def membership_changes(current, users, append=False):
+    # Users to add to and remove from the current members so the group holds
+    # users (only adding them with append), in one pass over each list.
+    current = current or []
+    members = set(current)
+    wanted = set()
+    added = []
+    for user in users:
+        if user not in wanted:
+            wanted.add(user)
+            if user not in members:
+                added.append(user)
+    removed = [] if append else [user for user in current if user not in wanted]
+    return added, removed
+
+
+def user_group_changes(existing, payload, append=False):
+    # Membership is diffed as sets rather than compared as a whole list, and
+    # the new list keeps the current members in their order.
+    changes = compute_changes(existing, payload, ignore=('group_name', 'users'))
+    added, removed = [], []
+    if 'users' in payload:
+        added, removed = membership_changes(existing.get('users'), payload['users'], append=append)
+        if added or removed:
+            removed_set = set(removed)
+            changes['users'] = [user for user in existing.get('users') or [] if user not in removed_set] + added
+    return changes, added, removed
+
+
+def get_group(client, group_id):
+    r = client.get(api_path('usergroups', group_id))
+
+    if r.status_code == 404:
+        return None
+    elif r.status_code != 200:
+        raise WallixError(f"Failed to get group: {r.status_code} {r.text}")
+    return r.json()
+
+
+def list_groups(client, page_size=500):
+    key = RESOURCE_KEYS['usergroups']
+    return {group[key]: group for group in client.iter_items("/api/usergroups", page_size=page_size)}
+
+
+def create_group(client, payload):
+    r = client.post("/api/usergroups", payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to create group: {r.status_code} {r.text}")
+
+
+def update_group(client, group_id, payload):
+    r = client.put(api_path('usergroups', group_id), payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to update group: {r.status_code} {r.text}")
+
+
+def delete_group(client, group_id):
+    r = client.delete(api_path('usergroups', group_id))
+    if r.status_code != 204:
+        raise WallixError(f"Failed to delete group: {r.status_code} {r.text}")
+
+
+def reconcile_user_group(client, group, params, check_mode=False):
+    group_id = params['group_name']
+
+    if params['state'] == 'absent':
+        if not group:
+            return dict(name=group_id, changed=False, msg="Group already absent.")
+        if not check_mode:
+            delete_group(client, group_id)
+        return dict(name=group_id, changed=True, msg="Group deleted.")
+
+    payload = build_user_group_payload(params)
+    if not group:
+        if not check_mode:
+            create_group(client, payload)
+        return dict(name=group_id, changed=True, msg="Group created.")
+
+    changes, added, removed = user_group_changes(group, payload, append=params['append'])
+    if not changes:
+        return dict(name=group_id, changed=False, msg="Group already up to date.")
+    if not check_mode:
+        update_group(client, group_id, changes)
+    msg = "Group updated."
+    if added or removed:
+        msg = f"Group updated, {len(added)} users added and {len(removed)} removed."
+    return dict(name=group_id, changed=True, msg=msg)
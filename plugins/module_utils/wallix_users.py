@@ -0,0 +1,101 @@
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import RESOURCE_KEYS, WallixError, api_path
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_diff import compute_changes
+
+
+def user_options():
+    return dict(
+        name=dict(type='str', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+        display_name=dict(type='str', required=False),
+        email=dict(type='str', required=False),
+        password=dict(type='str', required=False, no_log=True),
+        ssh_public_key=dict(type='str', required=False),
+        profile=dict(type='str', required=True),
+        groups=dict(type='list', elements='str', required=False),
+        ip_source=dict(type='str', required=False),
+        preferred_language=dict(type='str', required=False),
+        force_change_pwd=dict(type='bool', default=False),
+        user_auths=dict(type='list', elements='str', required=False),
+        expiration_date=dict(type='str', required=False),
+    )
+
+
+def build_user_payload(params):
+    payload = {
+        "user_name": params['name'],
+        "display_name": params['display_name'],
+        "email": params['email'],
+        "profile": params['profile'],
+        "password": params['password'],
+        "ssh_public_key": params['ssh_public_key'],
+        "groups": params['groups'],
+        "ip_source": params['ip_source'],
+        "preferred_language": params['preferred_language'],
+        "force_change_pwd": params['force_change_pwd'],
+        "user_auths": params['user_auths'],
+        "expiration_date": params['expiration_date']
+    }
+    # Remove None values
+    return {k: v for k, v in payload.items() if v is not None}
+
+
+def user_changes(existing, payload):
+    # The password is never returned by the API.
+    return compute_changes(existing, payload, defaults=dict(force_change_pwd=False), ignore=('user_name', 'password'))
+
+
+def get_user(client, username):
+    r = client.get(api_path('users', username))
+
+    if r.status_code == 404:
+        return None
+    elif r.status_code != 200:
+        raise WallixError(f"Failed to get user: {r.status_code} {r.text}")
+    return r.json()
+
+
+def list_users(client, page_size=500):
+    key = RESOURCE_KEYS['users']
+    return {user[key]: user for user in client.iter_items("/api/users", page_size=page_size)}
+
+
+def create_user(client, payload):
+    r = client.post("/api/users", payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to create user: {r.status_code} {r.text}")
+
+
+def update_user(client, username, payload):
+    r = client.put(api_path('users', username), payload)
+    if r.status_code != 204:
+        raise WallixError(f"Failed to update user: {r.status_code} {r.text}")
+
+
+def delete_user(client, username):
+    r = client.delete(api_path('users', username))
+    if r.status_code != 204:
+        raise WallixError(f"Failed to delete user: {r.status_code} {r.text}")
+
+
+def reconcile_user(client, user, params, check_mode=False):
+    username = params['name']
+
+    if params['state'] == 'absent':
+        if not user:
+            return dict(name=username, changed=False, msg="User already absent.")
+        if not check_mode:
+            delete_user(client, username)
+        return dict(name=username, changed=True, msg="User deleted.")
+
+    payload = build_user_payload(params)
+    if not user:
+        if not check_mode:
+            create_user(client, payload)
+        return dict(name=username, changed=True, msg="User created.")
+
+    changes = user_changes(user, payload)
+    if not changes:
+        return dict(name=username, changed=False, msg="User already up to date.")
+    if not check_mode:
+        update_user(client, username, changes)
+    return dict(name=username, changed=True, msg="User updated.")
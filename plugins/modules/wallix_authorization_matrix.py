@@ -0,0 +1,247 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_authorizations import (
+    list_authorizations, matrix_authorizations, matrix_options, matrix_plan, reconcile_authorization,
+)
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_on_bastions, run_parallel
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, wallix_argument_spec
+
+DOCUMENTATION = r'''
+---
+module: wallix_authorization_matrix
+
+short_description: Manage the authorizations between sets of Wallix user groups and target groups
+
+description:
+  - Creates, updates or deletes one authorization per (user group, target group) pair, all sharing the same settings.
+  - The pairs are the cross product of I(user_groups) and I(target_groups), plus I(pairs).
+  - The existing authorizations are listed once and matched by pair, whatever their name, then by name.
+    Only the needed changes are applied, in parallel.
+  - Each authorization is compared and updated exactly like with M(jphetphoumy.wallix.wallix_authorization),
+    whose options other than I(authorization_name), I(user_group) and I(target_group) are documented below
+    and shared by every pair.
+
+options:
+  user_groups:
+    description: User groups authorized on every target group of I(target_groups).
+    type: list
+    elements: str
+  target_groups:
+    description: Target groups every user group of I(user_groups) is authorized on.
+    type: list
+    elements: str
+  pairs:
+    description: Additional pairs, which may override the name, the description and the state.
+    type: list
+    elements: dict
+    suboptions:
+      user_group:
+        description: The user group.
+        required: true
+        type: str
+      target_group:
+        description: The target group.
+        required: true
+        type: str
+      authorization_name:
+        description: Name of the authorization, instead of the one built from I(name_template).
+        type: str
+      description:
+        description: Description of the authorization.
+        type: str
+      state:
+        description: Whether the authorization should be present or absent, instead of I(state).
+        choices: [present, absent]
+        type: str
+  name_template:
+    description:
+      - Name given to a new authorization, formatted with the parameters of its pair.
+      - Existing authorizations between the same groups keep their name.
+    type: str
+    default: "{user_group}_{target_group}"
+  exclusive:
+    description:
+      - Delete the existing authorizations between a user group and a target group of the matrix
+        that are not part of it.
+    type: bool
+    default: false
+  description:
+    description: Description of the authorizations, unless overridden by a pair.
+    type: str
+  subprotocols:
+    description:
+      - Subprotocols the authorizations give access to, such as C(SSH_SHELL_SESSION) or C(RDP).
+      - Compared regardless of their order.
+    type: list
+    elements: str
+  is_critical:
+    description: Whether the sessions opened through the authorizations are critical.
+    type: bool
+    default: false
+  is_recorded:
+    description: Whether the sessions opened through the authorizations are recorded.
+    type: bool
+    default: false
+  authorize_password_retrieval:
+    description: Whether the users may retrieve the passwords of the target accounts.
+    type: bool
+    default: false
+  authorize_sessions:
+    description: Whether the users may open sessions on the targets.
+    type: bool
+    default: false
+  authorize_session_sharing:
+    description: Whether the users may share their sessions with other users.
+    type: bool
+    default: false
+  session_sharing_mode:
+    description: How a shared session may be used by the invited users, C(view_only) or C(view_control).
+    type: str
+  approval_required:
+    description:
+      - Whether the sessions and password retrievals must be approved first.
+      - The options below are only sent to the bastion when it is C(true).
+    type: bool
+    default: false
+  approvers:
+    description: User groups allowed to approve the requests.
+    type: list
+    elements: str
+  has_comment:
+    description: Whether the users may give a comment with their requests.
+    type: bool
+  mandatory_comment:
+    description: Whether the comment is mandatory.
+    type: bool
+  has_ticket:
+    description: Whether the users may give a ticket number with their requests.
+    type: bool
+  mandatory_ticket:
+    description: Whether the ticket number is mandatory.
+    type: bool
+  active_quorum:
+    description: Number of approvals a request needs while an approver is connected.
+    type: int
+  inactive_quorum:
+    description: Number of approvals a request needs while no approver is connected.
+    type: int
+  single_connection:
+    description: Whether an approved request allows a single connection only.
+    type: bool
+  approval_timeout:
+    description: Number of minutes after which a request nobody answered is closed, C(0) for no limit.
+    type: int
+  state:
+    description: Whether the authorizations should be present or absent.
+    default: present
+    choices: [present, absent]
+    type: str
+  workers:
+    description: Number of authorizations written concurrently.
+    type: int
+    default: 8
+  page_size:
+    description: Number of authorizations fetched per request when listing the existing authorizations.
+    type: int
+    default: 500
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Let the ops teams open sessions on every production target group
+  wallix_authorization_matrix:
+    user_groups: [ops-paris, ops-lyon]
+    target_groups: [prod-linux, prod-windows, prod-db]
+    name_template: "{user_group}-on-{target_group}"
+    authorize_sessions: true
+    is_recorded: true
+    subprotocols: [SSH_SHELL_SESSION, RDP]
+    pairs:
+      - user_group: dba
+        target_group: prod-db
+    exclusive: true
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+'''
+
+RETURN = r'''
+changed:
+  description: Whether anything was changed.
+  type: bool
+  returned: always
+authorizations:
+  description: The outcome for each pair, followed by the authorizations deleted by I(exclusive).
+  type: list
+  elements: dict
+  returned: always
+  sample: [{"name": "ops-paris-on-prod-db", "user_group": "ops-paris", "target_group": "prod-db",
+            "changed": true, "msg": "Authorization created."}]
+bastions:
+  description: With I(api_urls), the result on each bastion, with its C(api_url), in place of the results above.
+  type: list
+  elements: dict
+  returned: when I(api_urls) is set
+  sample: [{"api_url": "https://bastion-paris.example.com", "changed": true,
+            "authorizations": [{"name": "ops-paris-on-prod-db", "user_group": "ops-paris", "target_group": "prod-db",
+                                "changed": true, "msg": "Authorization created."}]},
+           {"api_url": "https://bastion-dr.example.com", "changed": false, "failed": true,
+            "msg": "Request GET https://bastion-dr.example.com/api/authorizations failed: timed out"}]
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(matrix_options())
+    argument_spec.update(
+        workers=dict(type='int', default=8),
+        page_size=dict(type='int', default=500),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        required_together=[('user_groups', 'target_groups')],
+        required_one_of=[('user_groups', 'pairs')],
+        supports_check_mode=True
+    )
+
+    p = module.params
+
+    try:
+        desired = matrix_authorizations(p)
+    except KeyError as e:
+        module.fail_json(msg=f"Unknown field {e} in name_template.")
+
+    def run(client):
+        existing = list_authorizations(client, page_size=p['page_size'])
+        plan = matrix_plan(existing, desired, exclusive=p['exclusive'])
+
+        def apply(item):
+            params, current = item
+            if 'conflict' in params:
+                raise WallixError(f"Authorization {params['authorization_name']} already exists between "
+                                  f"{params['conflict'][0]} and {params['conflict'][1]}.")
+            return reconcile_authorization(client, current, params, check_mode=module.check_mode)
+
+        results = []
+        failed = 0
+        for (params, current), (result, error) in zip(plan, run_parallel(apply, plan, p['workers'])):
+            if error:
+                failed += 1
+                result = dict(name=params['authorization_name'], changed=False, failed=True, msg=error)
+            results.append(dict(result, user_group=params['user_group'], target_group=params['target_group']))
+
+        changed = any(result['changed'] for result in results)
+        if failed:
+            return dict(failed=True, msg=f"Failed to apply {failed} of {len(results)} authorizations.",
+                        changed=changed, authorizations=results)
+        return dict(changed=changed, authorizations=results)
+
+    run_on_bastions(module, run, pool_size=max(p['pool_size'], p['workers']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_on_bastions
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import wallix_argument_spec
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_device_accounts import (
+    device_account_options, list_device_accounts, reconcile_account,
+)
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_journal import AsyncProgress, open_journal, run_journaled
+
+DOCUMENTATION = r'''
+---
+module: wallix_device_accounts
+
+short_description: Manage the accounts of many Wallix devices in one task
+
+description:
+  - Create, update or delete accounts on the local domains of any number of devices of a Wallix Bastion.
+  - The existing accounts are listed once per device and local domain, then the changes are applied in parallel,
+    with at most I(per_device_workers) requests at a time on the same device.
+  - Each account is handled exactly like with M(jphetphoumy.wallix.wallix_device_account).
+
+options:
+  accounts:
+    description: The accounts to manage, with the same options as M(jphetphoumy.wallix.wallix_device_account).
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      account_name:
+        description: The account name.
+        required: true
+        type: str
+      account_login:
+        description: The login of the account on the device.
+        type: str
+      description:
+        description: Description of the account.
+        type: str
+      credentials:
+        description: Credentials of the account.
+        type: list
+        elements: dict
+      checkout_policy:
+        description: Checkout policy of the account.
+        type: str
+        default: default
+      device_id:
+        description: The device holding the account.
+        required: true
+        type: str
+      domain_id:
+        description: The local domain of the device holding the account.
+        required: true
+        type: str
+      state:
+        description: Whether the account should be present or absent.
+        default: present
+        choices: [present, absent]
+        type: str
+  workers:
+    description: Number of accounts written concurrently.
+    type: int
+    default: 8
+  per_device_workers:
+    description: Number of accounts of the same device written concurrently.
+    type: int
+    default: 2
+  page_size:
+    description: Number of accounts fetched per request when listing the existing accounts.
+    type: int
+    default: 500
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+  - jphetphoumy.wallix.wallix.checkpoint
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Provision service accounts
+  wallix_device_accounts:
+    accounts:
+      - device_id: srv1
+        domain_id: local
+        account_name: backup
+      - device_id: srv2
+        domain_id: local
+        account_name: backup
+      - device_id: srv2
+        domain_id: local
+        account_name: olduser
+        state: absent
+    per_device_workers: 1
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+'''
+
+RETURN = r'''
+changed:
+  description: Whether anything was changed.
+  type: bool
+  returned: always
+accounts:
+  description: The outcome for each account, in the order of I(accounts).
+  type: list
+  elements: dict
+  returned: always
+  sample: [{"name": "backup", "device_id": "srv1", "domain_id": "local", "changed": true, "msg": "Account created."}]
+resumed:
+  description: Number of accounts taken from the I(checkpoint) journal of an interrupted run.
+  type: int
+  returned: when I(checkpoint) is set
+bastions:
+  description: With I(api_urls), the result on each bastion, with its C(api_url), in place of the results above.
+  type: list
+  elements: dict
+  returned: when I(api_urls) is set
+  sample: [{"api_url": "https://bastion-paris.example.com", "changed": true,
+            "accounts": [{"name": "backup", "device_id": "srv1", "domain_id": "local", "changed": true,
+                          "msg": "Account created."}]},
+           {"api_url": "https://bastion-dr.example.com", "changed": false, "failed": true,
+            "msg": "Request GET https://bastion-dr.example.com/api/devices/srv1/localdomains/local/accounts failed: timed out"}]
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(
+        accounts=dict(type='list', elements='dict', required=True, options=device_account_options()),
+        workers=dict(type='int', default=8),
+        per_device_workers=dict(type='int', default=2),
+        page_size=dict(type='int', default=500),
+        checkpoint=dict(type='path', required=False),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    p = module.params
+    progress = AsyncProgress()
+
+    def account_key(account):
+        return (account['device_id'], account['domain_id'], account['account_name'])
+
+    def run(client):
+        journal = open_journal(module, client, p['accounts'])
+        failed = None
+        try:
+            # Only the devices and domains of the accounts not applied yet are listed.
+            pending = [account for account in p['accounts'] if not journal or journal.get(account_key(account)) is None]
+            existing = {}
+            if pending:
+                existing = list_device_accounts(client, pending, page_size=p['page_size'], workers=p['workers'])
+
+            def apply(account):
+                return reconcile_account(client, existing.get(account_key(account)), account, check_mode=module.check_mode)
+
+            results = []
+            failed = 0
+            outcomes = run_journaled(apply, p['accounts'], p['workers'], account_key, journal, progress,
+                                     key=lambda account: account['device_id'], per_key=p['per_device_workers'])
+            for account, (result, error) in zip(p['accounts'], outcomes):
+                if error:
+                    failed += 1
+                    result = dict(name=account['account_name'], changed=False, failed=True, msg=error)
+                results.append(dict(result, device_id=account['device_id'], domain_id=account['domain_id']))
+        finally:
+            if journal:
+                journal.close(remove=failed == 0)
+
+        changed = any(result['changed'] for result in results)
+        extra = dict(resumed=len(journal.done)) if journal else {}
+        if failed:
+            return dict(failed=True, msg=f"Failed to apply {failed} of {len(results)} accounts.", changed=changed,
+                        accounts=results, **extra)
+        return dict(changed=changed, accounts=results, **extra)
+
+    run_on_bastions(module, run, pool_size=max(p['pool_size'], p['workers']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, wallix_argument_spec, wallix_client
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_drift import FingerprintStore, detect_drift, fetch_changed
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_export import EXPORT_PATHS
+
+DOCUMENTATION = r'''
+---
+module: wallix_drift
+
+short_description: Report the Wallix objects added, removed or modified since the last run
+
+description:
+  - Lists the objects of each type and compares the fingerprint of every object with the one saved by the
+    previous run in I(store), then saves the new fingerprints.
+  - Fingerprints are hashes of the objects normalized the way the other modules compare them,
+    so reordering a list or returning a field as null is not reported.
+  - Only the listings are fetched, projected on I(fields) when set. The whole body is only fetched for the
+    added and modified objects, with I(fetch).
+  - The first run, and the first run after I(fields) changed for a type, only records the fingerprints of that type.
+
+options:
+  store:
+    description: File holding the fingerprints, on the host running the module.
+    required: true
+    type: path
+  resources:
+    description: The types of objects to watch.
+    type: list
+    elements: str
+    choices: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+    default: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+  fields:
+    description:
+      - 'For each type, the fields to watch, for example C({"users": ["profile", "groups", "user_auths"]}).'
+      - Other changes to the objects of that type are not reported, and lighter listings are fetched.
+    type: dict
+    default: {}
+  fetch:
+    description: Also return the whole body of the added and modified objects.
+    type: bool
+    default: false
+  workers:
+    description: Number of requests sent concurrently.
+    type: int
+    default: 6
+  page_size:
+    description: Number of objects fetched per request.
+    type: int
+    default: 500
+
+notes:
+  - I(changed) is true when drift was found. In check mode, the fingerprints are not saved.
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Hourly drift check of the access rules
+  wallix_drift:
+    store: /var/lib/wallix/fingerprints.json
+    resources: [user_groups, target_groups, authorizations]
+    fetch: true
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+  register: drift
+'''
+
+RETURN = r'''
+changed:
+  description: Whether any object was added, removed or modified.
+  type: bool
+  returned: always
+drift:
+  description:
+    - For each type already in the store, the keys of the objects added, removed and modified.
+    - Device accounts are keyed by C(device/domain/account).
+  type: dict
+  returned: always
+  sample: {"users": {"added": ["jdoe"], "removed": [], "modified": ["admin"]}}
+initialized:
+  description: The types whose fingerprints were recorded for the first time.
+  type: list
+  elements: str
+  returned: always
+objects:
+  description: For each type, the body of each added and modified object, null when deleted meanwhile.
+  type: dict
+  returned: when I(fetch=true)
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(
+        store=dict(type='path', required=True),
+        resources=dict(type='list', elements='str', choices=list(EXPORT_PATHS), default=list(EXPORT_PATHS)),
+        fields=dict(type='dict', default={}),
+        fetch=dict(type='bool', default=False),
+        workers=dict(type='int', default=6),
+        page_size=dict(type='int', default=500),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    p = module.params
+    unknown = set(p['fields']) - set(EXPORT_PATHS)
+    if unknown:
+        module.fail_json(msg=f"Unknown types in fields: {', '.join(sorted(unknown))}")
+
+    client = wallix_client(module, pool_size=max(p['pool_size'], p['workers']))
+    names = [name for name in EXPORT_PATHS if name in p['resources']]
+    result = {}
+
+    try:
+        store = FingerprintStore(p['store'], client.api_url)
+        drift, initialized = detect_drift(client, store, names, fields=p['fields'], page_size=p['page_size'],
+                                          workers=p['workers'])
+        if p['fetch']:
+            result['objects'] = fetch_changed(client, drift, workers=p['workers'])
+        if not module.check_mode:
+            store.save()
+    except WallixError as e:
+        module.fail_json(msg=str(e))
+    except OSError as e:
+        module.fail_json(msg=f"Failed to save fingerprints {p['store']}: {e}")
+
+    changed = any(keys for changes in drift.values() for keys in changes.values())
+    module.exit_json(changed=changed, drift=drift, initialized=initialized, **result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, wallix_argument_spec, wallix_client
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_export import EXPORT_PATHS, export_file, export_resources
+
+DOCUMENTATION = r'''
+---
+module: wallix_export
+
+short_description: Export the configuration of a Wallix Bastion to files
+
+description:
+  - Writes users, user groups, devices, device accounts, target groups and authorizations to I(dest),
+    one gzipped file of JSON objects, one per line, for each type.
+  - The types are listed concurrently, one page at a time, and each page is written as it arrives,
+    so memory does not grow with the number of objects.
+  - The progress is saved after every page. When an export was interrupted, running the module again
+    on the same I(dest) resumes it from the last complete page of each type.
+  - The files can be loaded back with M(jphetphoumy.wallix.wallix_restore).
+  - The files are written on the host running the module.
+
+options:
+  dest:
+    description: Directory of the export.
+    required: true
+    type: path
+  resources:
+    description: The types of objects to export.
+    type: list
+    elements: str
+    choices: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+    default: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+  resume:
+    description:
+      - Resume the export found in I(dest). When false, or when there is none, a new export replaces it.
+      - A finished export is not listed again unless I(resume=false).
+    type: bool
+    default: true
+  workers:
+    description: Number of types exported concurrently.
+    type: int
+    default: 6
+  page_size:
+    description: Number of objects fetched per request, and written between two saves of the progress.
+    type: int
+    default: 500
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Snapshot the bastion before the migration
+  wallix_export:
+    dest: /var/backups/wallix/{{ ansible_date_time.date }}
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+'''
+
+RETURN = r'''
+dest:
+  description: Directory of the export.
+  type: str
+  returned: always
+resumed:
+  description: Whether an interrupted export was resumed.
+  type: bool
+  returned: always
+resources:
+  description: For each type, its file and the number of objects it holds.
+  type: dict
+  returned: always
+  sample: {"users": {"path": "/var/backups/wallix/users.ndjson.gz", "count": 52014}}
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(
+        dest=dict(type='path', required=True),
+        resources=dict(type='list', elements='str', choices=list(EXPORT_PATHS), default=list(EXPORT_PATHS)),
+        resume=dict(type='bool', default=True),
+        workers=dict(type='int', default=6),
+        page_size=dict(type='int', default=500),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=False
+    )
+
+    p = module.params
+    client = wallix_client(module, pool_size=max(p['pool_size'], p['workers']))
+    names = [name for name in EXPORT_PATHS if name in p['resources']]
+
+    try:
+        export, errors = export_resources(client, p['dest'], names, page_size=p['page_size'], workers=p['workers'],
+                                          resume=p['resume'])
+    except WallixError as e:
+        module.fail_json(msg=str(e))
+    except OSError as e:
+        module.fail_json(msg=f"Failed to write the export to {p['dest']}: {e}")
+
+    resources = {}
+    for name in names:
+        state = export.manifest['resources'].get(name, {})
+        resources[name] = dict(path=export_file(p['dest'], name), count=state.get('offset', 0))
+        if name in errors:
+            resources[name].update(failed=True, msg=errors[name])
+
+    if errors:
+        module.fail_json(msg=f"Failed to export {', '.join(errors)}; run again to resume.", dest=p['dest'],
+                         resumed=export.resumed, resources=resources)
+    module.exit_json(changed=False, dest=p['dest'], resumed=export.resumed, resources=resources)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/python
+
+from itertools import islice
+import json
+import os
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, api_path, wallix_argument_spec, wallix_client
+
+DOCUMENTATION = r'''
+---
+module: wallix_info
+
+short_description: List Wallix objects
+
+description:
+  - Returns users, user groups, devices, device accounts, target groups or authorizations of a Wallix Bastion.
+  - Filtering, field projection and pagination are done by the API; each page is decoded object by object,
+    so memory stays bounded on large listings.
+  - With I(dest), the objects are written to a file instead of being returned.
+
+options:
+  resource:
+    description: The type of objects to list.
+    required: true
+    choices: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+    type: str
+  device_id:
+    description:
+      - Device of the accounts to list, with I(domain_id), when I(resource=device_accounts).
+      - All the accounts of the bastion are listed when omitted.
+    type: str
+  domain_id:
+    description: Local domain of the accounts to list, with I(device_id).
+    type: str
+  q:
+    description: Filter applied by the API, for example C(user_name=j*).
+    type: str
+  fields:
+    description: Only return these fields of each object.
+    type: list
+    elements: str
+  limit:
+    description: Maximum number of objects returned. All of them by default.
+    type: int
+  page_size:
+    description: Number of objects fetched per request.
+    type: int
+    default: 500
+  dest:
+    description:
+      - Write the objects to this file, one JSON object per line, instead of returning them.
+      - The file is written on the host running the module.
+    type: path
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Users whose name starts with j
+  wallix_info:
+    resource: users
+    q: "user_name=j*"
+    fields: [user_name, email, groups]
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+  register: users
+
+- name: Dump every account of the bastion
+  wallix_info:
+    resource: device_accounts
+    fields: [account_name, device, domain]
+    dest: /var/tmp/wallix_accounts.ndjson
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+'''
+
+RETURN = r'''
+objects:
+  description: The objects listed.
+  type: list
+  elements: dict
+  returned: when I(dest) is not set
+count:
+  description: Number of objects listed.
+  type: int
+  returned: always
+dest:
+  description: File the objects were written to.
+  type: str
+  returned: when I(dest) is set
+'''
+
+PATHS = {
+    'users': "/api/users",
+    'user_groups': "/api/usergroups",
+    'devices': "/api/devices",
+    'device_accounts': "/api/accounts",
+    'target_groups': "/api/targetgroups",
+    'authorizations': "/api/authorizations",
+}
+
+def write_objects(dest, objects):
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), prefix='.wallix_info-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for obj in objects:
+                f.write(json.dumps(obj))
+                f.write('\n')
+                count += 1
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(
+        resource=dict(type='str', required=True, choices=list(PATHS)),
+        device_id=dict(type='str', required=False),
+        domain_id=dict(type='str', required=False),
+        q=dict(type='str', required=False),
+        fields=dict(type='list', elements='str', required=False),
+        limit=dict(type='int', required=False),
+        page_size=dict(type='int', default=500),
+        dest=dict(type='path', required=False),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        required_together=[('device_id', 'domain_id')],
+        supports_check_mode=True
+    )
+
+    p = module.params
+    client = wallix_client(module)
+
+    path = PATHS[p['resource']]
+    if p['resource'] == 'device_accounts' and p['device_id']:
+        path = api_path('devices', p['device_id'], 'localdomains', p['domain_id'], 'accounts')
+
+    params = {}
+    if p['q']:
+        params['q'] = p['q']
+    if p['fields']:
+        params['fields'] = ','.join(p['fields'])
+
+    page_size = p['page_size']
+    if p['limit'] is not None:
+        page_size = max(1, min(page_size, p['limit']))
+    objects = islice(client.iter_items(path, params=params, page_size=page_size), p['limit'])
+
+    try:
+        if p['dest']:
+            count = write_objects(p['dest'], objects)
+            module.exit_json(changed=False, count=count, dest=p['dest'])
+        objects = list(objects)
+    except WallixError as e:
+        module.fail_json(msg=str(e))
+
+    module.exit_json(changed=False, count=len(objects), objects=objects)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, wallix_argument_spec, wallix_client
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_export import EXPORT_PATHS, MANIFEST, restore_resources
+
+DOCUMENTATION = r'''
+---
+module: wallix_restore
+
+short_description: Restore the configuration of a Wallix Bastion from an export
+
+description:
+  - Creates the objects of an export made by M(jphetphoumy.wallix.wallix_export) that are missing from the bastion.
+    Existing objects are left as they are.
+  - The objects are created by dependency level (users and devices, then user groups and device accounts,
+    then target groups, then authorizations), the objects of one level concurrently.
+    A level is not restored when the previous one had failures.
+  - Only the names of the existing objects are listed, and the export is read in batches.
+  - Passwords and credentials are not returned by the API, so they are not part of the export,
+    and restored users and accounts have none.
+
+options:
+  src:
+    description: Directory of the export, on the host running the module.
+    required: true
+    type: path
+  resources:
+    description: The types of objects to restore.
+    type: list
+    elements: str
+    choices: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+    default: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+  workers:
+    description: Number of objects created concurrently.
+    type: int
+    default: 8
+  page_size:
+    description: Number of objects fetched per request when listing the existing objects.
+    type: int
+    default: 500
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Recreate what the migration deleted
+  wallix_restore:
+    src: /var/backups/wallix/2024-05-02
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+'''
+
+RETURN = r'''
+changed:
+  description: Whether any object was created.
+  type: bool
+  returned: always
+resources:
+  description: For each type, the number of objects created, already present and failed, with the first errors.
+  type: dict
+  returned: always
+  sample: {"users": {"created": 12, "skipped": 52002, "failed": 0, "errors": []}}
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(
+        src=dict(type='path', required=True),
+        resources=dict(type='list', elements='str', choices=list(EXPORT_PATHS), default=list(EXPORT_PATHS)),
+        workers=dict(type='int', default=8),
+        page_size=dict(type='int', default=500),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    p = module.params
+    if not os.path.exists(os.path.join(p['src'], MANIFEST)):
+        module.fail_json(msg=f"{p['src']} is not an export.")
+
+    client = wallix_client(module, pool_size=max(p['pool_size'], p['workers']))
+    names = [name for name in EXPORT_PATHS if name in p['resources']]
+
+    try:
+        resources = restore_resources(client, p['src'], names, workers=p['workers'], page_size=p['page_size'],
+                                      check_mode=module.check_mode)
+    except WallixError as e:
+        module.fail_json(msg=str(e))
+    except (OSError, ValueError) as e:
+        module.fail_json(msg=f"Failed to read the export from {p['src']}: {e}")
+
+    changed = any(result['created'] for result in resources.values())
+    failed = sum(result['failed'] for result in resources.values())
+    if failed:
+        module.fail_json(msg=f"Failed to restore {failed} objects.", changed=changed, resources=resources)
+    module.exit_json(changed=changed, resources=resources)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_on_bastions
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import WallixError, wallix_argument_spec
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_journal import AsyncProgress, open_journal
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_plan import read_plan, write_plan
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_state import RESOURCES, apply_plan, apply_state, plan_state
+
+DOCUMENTATION = r'''
+---
+module: wallix_state
+
+short_description: Apply a complete Wallix configuration in one task
+
+description:
+  - Reconciles users, user groups, devices, device accounts, target groups and authorizations in one pass.
+  - Each resource type is listed once. Objects are then applied by dependency level
+    (users and devices, then user groups and device accounts, then target groups, then authorizations),
+    the objects of one level being applied concurrently.
+  - Objects with I(state=absent) are deleted first, in the reverse order.
+  - Every object takes the same options as the corresponding single module.
+  - With I(plan), the changes are computed but not applied. Every write the run would send is saved to a file,
+    with a fingerprint of the object it was computed from. A later run with I(apply_plan) sends these writes,
+    after checking that each object it changes is still the one the plan saw, without listing anything again.
+  - With I(prune), the existing objects of the given types that are not in the task are deleted as well,
+    concurrently and in dependency order, along with the objects with I(state=absent).
+
+options:
+  users:
+    description: Users, as in M(jphetphoumy.wallix.wallix_user).
+    type: list
+    elements: dict
+  user_groups:
+    description: User groups, as in M(jphetphoumy.wallix.wallix_user_group).
+    type: list
+    elements: dict
+  devices:
+    description: Devices, as in M(jphetphoumy.wallix.wallix_device).
+    type: list
+    elements: dict
+  device_accounts:
+    description: Device accounts, as in M(jphetphoumy.wallix.wallix_device_account).
+    type: list
+    elements: dict
+  target_groups:
+    description: Target groups, as in M(jphetphoumy.wallix.wallix_target_group).
+    type: list
+    elements: dict
+  authorizations:
+    description: Authorizations, as in M(jphetphoumy.wallix.wallix_authorization).
+    type: list
+    elements: dict
+  workers:
+    description: Number of objects written concurrently.
+    type: int
+    default: 8
+  page_size:
+    description: Number of objects fetched per request when listing the existing objects.
+    type: int
+    default: 500
+  plan:
+    description:
+      - Save the changes to this file instead of applying them.
+      - The file holds the payloads sent to the bastion, passwords included; it is only readable by its owner.
+    type: path
+  apply_plan:
+    description:
+      - Apply the changes saved to this file by a run with I(plan), ignoring the resource options.
+      - The writes are sent by dependency level, the objects of one level concurrently and the writes to one object,
+        like a device and its services, in their planned order. An object changed since the plan was made fails
+        its writes, and the following levels are not applied.
+    type: path
+  prune:
+    description:
+      - Delete the existing objects of these types that are not in the task, even when the task has none of that type.
+      - Device accounts are only pruned on the local domains of the device accounts of the task.
+      - The user the module connects with is never pruned.
+    type: list
+    elements: str
+    choices: [users, user_groups, devices, device_accounts, target_groups, authorizations]
+    default: []
+  prune_include:
+    description:
+      - Only prune the objects whose name matches one of these shell patterns, for example C(svc_*).
+      - Device accounts are matched as C(device/domain/account).
+    type: list
+    elements: str
+    default: ["*"]
+  prune_exclude:
+    description: Never prune the objects whose name matches one of these shell patterns.
+    type: list
+    elements: str
+    default: []
+  prune_limit:
+    description:
+      - Fail without changing anything when more than this number of objects would be pruned. C(0) for no limit.
+      - Guards against a task run with a truncated list of objects.
+    type: int
+    default: 100
+
+notes:
+  - I(checkpoint) is ignored with I(plan) and I(apply_plan).
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+  - jphetphoumy.wallix.wallix.checkpoint
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Apply the bastion configuration
+  wallix_state:
+    users:
+      - name: jdoe
+        profile: user
+    user_groups:
+      - group_name: admins
+        users: [jdoe]
+    devices:
+      - device_name: srv1
+        host: 10.0.0.1
+    target_groups:
+      - group_name: linux
+    authorizations:
+      - authorization_name: admins_linux
+        user_group: admins
+        target_group: linux
+        authorize_sessions: true
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+
+- name: Delete the contractor accounts that left
+  wallix_state:
+    users: "{{ contractors }}"
+    prune: [users]
+    prune_include: ["ext_*"]
+    prune_limit: 500
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+
+- name: Save the changes for review
+  wallix_state:
+    users: "{{ wallix_users }}"
+    user_groups: "{{ wallix_user_groups }}"
+    plan: /srv/plans/wallix.json
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+
+- name: Apply the reviewed changes
+  wallix_state:
+    apply_plan: /srv/plans/wallix.json
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+'''
+
+RETURN = r'''
+changed:
+  description: Whether anything was changed.
+  type: bool
+  returned: always
+users:
+  description: The outcome for each user. The other resource types are returned the same way, under their option name.
+  type: list
+  elements: dict
+  returned: when I(users) is set
+  sample: [{"name": "jdoe", "changed": true, "msg": "User created."},
+           {"name": "ext_old", "changed": true, "msg": "User deleted.", "pruned": true}]
+plan:
+  description: The file the plan was saved to and the number of writes it holds.
+  type: dict
+  returned: when I(plan) is set
+  sample: {"path": "/srv/plans/wallix.json", "operations": 3}
+resumed:
+  description: Number of objects taken from the I(checkpoint) journal of an interrupted run.
+  type: int
+  returned: when I(checkpoint) is set, without I(plan) or I(apply_plan)
+bastions:
+  description: With I(api_urls), the result on each bastion, with its C(api_url), in place of the results above.
+  type: list
+  elements: dict
+  returned: when I(api_urls) is set
+  sample: [{"api_url": "https://bastion-paris.example.com", "changed": true,
+            "users": [{"name": "jdoe", "changed": true, "msg": "User created."}],
+            "user_groups": [{"name": "ops", "changed": false, "msg": "Group already up to date."}]},
+           {"api_url": "https://bastion-dr.example.com", "changed": false, "failed": true,
+            "msg": "Request GET https://bastion-dr.example.com/api/users failed: timed out"}]
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    for name, spec in RESOURCES.items():
+        argument_spec[name] = dict(type='list', elements='dict', required=False, options=spec['options']())
+    argument_spec.update(
+        workers=dict(type='int', default=8),
+        page_size=dict(type='int', default=500),
+        plan=dict(type='path', required=False),
+        apply_plan=dict(type='path', required=False),
+        checkpoint=dict(type='path', required=False),
+        prune=dict(type='list', elements='str', choices=list(RESOURCES), default=[]),
+        prune_include=dict(type='list', elements='str', default=['*']),
+        prune_exclude=dict(type='list', elements='str', default=[]),
+        prune_limit=dict(type='int', default=100),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        mutually_exclusive=[('plan', 'apply_plan')],
+        supports_check_mode=True
+    )
+
+    p = module.params
+    if p['api_urls'] and (p['plan'] or p['apply_plan']):
+        module.fail_json(msg="plan and apply_plan only support a single api_url.")
+    desired = {name: p[name] for name in RESOURCES if p[name]}
+    prune = None
+    if p['prune']:
+        prune = dict(types=p['prune'], include=p['prune_include'], exclude=p['prune_exclude'], limit=p['prune_limit'],
+                     keep=dict(users=[p['wallix_user']]))
+    progress = AsyncProgress()
+
+    def run(client):
+        extra = {}
+        if p['apply_plan']:
+            plan = read_plan(p['apply_plan'], client.api_url)
+            results, failed = apply_plan(client, plan, workers=p['workers'], check_mode=module.check_mode)
+        elif p['plan']:
+            plan, results, failed = plan_state(client, desired, workers=p['workers'], page_size=p['page_size'],
+                                               prune=prune)
+            if not failed:
+                try:
+                    write_plan(p['plan'], plan)
+                except OSError as e:
+                    raise WallixError(f"Failed to write plan {p['plan']}: {e}")
+            extra['plan'] = dict(path=p['plan'], operations=len(plan['operations']))
+        else:
+            journal = open_journal(module, client, [desired, prune])
+            failed = None
+            try:
+                results, failed = apply_state(client, desired, workers=p['workers'], page_size=p['page_size'],
+                                              check_mode=module.check_mode, prune=prune, journal=journal,
+                                              progress=progress)
+            finally:
+                if journal:
+                    journal.close(remove=failed == 0)
+            if journal:
+                extra['resumed'] = len(journal.done)
+
+        changed = any(result['changed'] for items in results.values() for result in items)
+        if failed:
+            return dict(failed=True, msg=f"Failed to apply {failed} objects.", changed=changed, **results, **extra)
+        return dict(changed=changed, **results, **extra)
+
+    run_on_bastions(module, run, pool_size=max(p['pool_size'], p['workers']))
+
+if __name__ == '__main__':
+    main()
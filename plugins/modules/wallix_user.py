@@ -1,8 +1,9 @@
 #!/usr/bin/python
 
 from ansible.module_utils.basic import AnsibleModule
-import requests
-import json
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_on_bastions
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import wallix_argument_spec
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_users import get_user, reconcile_user, user_options
 
 DOCUMENTATION = r'''
 ---
@@ -67,10 +68,9 @@ options:
     description: Authentication methods.
     type: list
     elements: str
-  api_url:
-    description: Base URL of the Wallix API.
-    required: true
-    type: str
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
 
 author:
   - You 😉
@@ -93,6 +93,17 @@ EXAMPLES = r'''
     expiration_date: "2016-12-31 23:59"
     api_url: "https://example.com"
     state: present
+
+- name: Create the user on every bastion
+  wallix_user:
+    name: jdoe
+    profile: user
+    api_url: "https://bastion-paris.example.com"
+    api_urls:
+      - "https://bastion-lyon.example.com"
+      - "https://bastion-dr.example.com"
+    wallix_user: admin
+    wallix_password: secret
 '''
 
 RETURN = r'''
@@ -100,104 +111,32 @@ changed:
   description: Whether anything was changed.
   type: bool
   returned: always
+bastions:
+  description: With I(api_urls), the result on each bastion, with its C(api_url), in place of the results above.
+  type: list
+  elements: dict
+  returned: when I(api_urls) is set
+  sample: [{"api_url": "https://bastion-paris.example.com", "changed": true, "msg": "User created."},
+           {"api_url": "https://bastion-dr.example.com", "changed": false, "failed": true,
+            "msg": "Request GET https://bastion-dr.example.com/api/users/jdoe failed: timed out"}]
 '''
 
-def get_user(module, api_url, wallix_user, wallix_password, username):
-    url = f"{api_url}/api/users/{username}"
-    #headers = {'Authorization': f'Bearer {token}'}
-    auth = (wallix_user, wallix_password)
-    r = requests.get(url, auth=auth, verify=False)
-
-    if r.status_code == 404:
-        return None
-    elif r.status_code != 200:
-        module.fail_json(msg=f"Failed to get user: {r.status_code} {r.text}")
-    return r.json()
-
-def create_user(module, api_url, wallix_user, wallix_password, payload):
-    url = f"{api_url}/api/users"
-    headers = {
-        'Content-Type': 'application/json'
-    }
-    auth = (wallix_user, wallix_password)
-    r = requests.post(url, auth=auth, headers=headers, data=json.dumps(payload), verify=False)
-    if r.status_code != 204:
-        module.fail_json(msg=f"Failed to create user: {r.status_code} {r.text}")
-
-def delete_user(module, api_url, wallix_user, wallix_password, username):
-    url = f"{api_url}/api/users/{username}"
-    #headers = {'Authorization': f'Bearer {token}'}
-    auth = (wallix_user, wallix_password)
-    r = requests.delete(url, auth=auth, verify=False)
-    if r.status_code != 204:
-        module.fail_json(msg=f"Failed to delete user: {r.status_code} {r.text}")
-
 def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(user_options())
     module = AnsibleModule(
-        argument_spec=dict(
-            name=dict(type='str', required=True),
-            state=dict(type='str', default='present', choices=['present', 'absent']),
-            display_name=dict(type='str', required=False),
-            email=dict(type='str', required=False),
-            password=dict(type='str', required=False, no_log=True),
-            ssh_public_key=dict(type='str', required=False),
-            profile=dict(type='str', required=True),
-            groups=dict(type='list', elements='str', required=False),
-            ip_source=dict(type='str', required=False),
-            preferred_language=dict(type='str', required=False),
-            force_change_pwd=dict(type='bool', default=False),
-            user_auths=dict(type='list', elements='str', required=False),
-            expiration_date=dict(type='str', required=False),
-            api_url=dict(type='str', required=True),
-            wallix_user=dict(type='str', required=True),
-            wallix_password=dict(type='str', required=True, no_log=True)
-        ),
+        argument_spec=argument_spec,
         supports_check_mode=True
     )
 
     params = module.params
-    username = params['name']
-    state = params['state']
-    profile = params['profile']
-    api_url = params['api_url']
-    wallix_user = params['wallix_user']
-    wallix_password = params['wallix_password']
-
-    user = get_user(module, api_url, wallix_user, wallix_password, username)
 
-    if state == 'present':
-        if user:
-            # Future: Implement diff logic
-            module.exit_json(changed=False, msg="User already exists.")
-        else:
-            if module.check_mode:
-                module.exit_json(changed=True)
-            payload = {
-                "user_name": username,
-                "display_name": params['display_name'],
-                "email": params['email'],
-                "profile": params['profile'],
-                "password": params['password'],
-                "ssh_public_key": params['ssh_public_key'],
-                "groups": params['groups'],
-                "ip_source": params['ip_source'],
-                "preferred_language": params['preferred_language'],
-                "force_change_pwd": params['force_change_pwd'],
-                "user_auths": params['user_auths'],
-                "expiration_date": params['expiration_date']
-            }
-            # Remove None values
-            payload = {k: v for k, v in payload.items() if v is not None}
-            create_user(module, api_url, wallix_user, wallix_password, payload)
-            module.exit_json(changed=True, msg="User created.")
+    def run(client):
+        user = get_user(client, params['name'])
+        result = reconcile_user(client, user, params, check_mode=module.check_mode)
+        return dict(changed=result['changed'], msg=result['msg'])
 
-    elif state == 'absent':
-        if not user:
-            module.exit_json(changed=False, msg="User already absent.")
-        if module.check_mode:
-            module.exit_json(changed=True)
-        delete_user(module, api_url, wallix_user, wallix_password, username)
-        module.exit_json(changed=True, msg="User deleted.")
+    run_on_bastions(module, run)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,193 @@
+#!/usr/bin/python
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_bulk import run_on_bastions
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_client import wallix_argument_spec
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_journal import AsyncProgress, open_journal, run_journaled
+from ansible_collections.jphetphoumy.wallix.plugins.module_utils.wallix_users import list_users, reconcile_user, user_options
+
+DOCUMENTATION = r'''
+---
+module: wallix_users
+
+short_description: Manage many Wallix users in one task
+
+description:
+  - Create, update or delete a list of users in Wallix Bastion.
+  - The existing users are listed once, then the changes are applied in parallel.
+  - Each user is handled exactly like with M(jphetphoumy.wallix.wallix_user).
+
+options:
+  users:
+    description: The users to manage, with the same options as M(jphetphoumy.wallix.wallix_user).
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description: The user name.
+        required: true
+        type: str
+      state:
+        description: Whether the user should be present or absent.
+        default: present
+        choices: [present, absent]
+        type: str
+      profile:
+        description: The profile to use for the user
+        required: true
+        type: str
+      email:
+        description: User email address.
+        type: str
+      display_name:
+        description: Full name of the user.
+        type: str
+      password:
+        description: User password (required if no SSH key or cert).
+        type: str
+      ssh_public_key:
+        description: Ssh public key (required if local_sshkey)
+        type: str
+      groups:
+        description: List of groups the user belongs to.
+        type: list
+        elements: str
+      ip_source:
+        description: IP source of the user.
+        type: str
+      preferred_language:
+        description: Language preference.
+        type: str
+      expiration_date:
+        description: User expiration date.
+        type: str
+      force_change_pwd:
+        description: Force password change on next login.
+        type: bool
+        default: false
+      user_auths:
+        description: Authentication methods.
+        type: list
+        elements: str
+  workers:
+    description: Number of users written concurrently.
+    type: int
+    default: 8
+  page_size:
+    description: Number of users fetched per request when listing the existing users.
+    type: int
+    default: 500
+
+extends_documentation_fragment:
+  - jphetphoumy.wallix.wallix
+  - jphetphoumy.wallix.wallix.checkpoint
+
+author:
+  - You 😉
+'''
+
+EXAMPLES = r'''
+- name: Onboard Wallix users
+  wallix_users:
+    users:
+      - name: jdoe
+        display_name: John Doe
+        profile: user
+        user_auths:
+          - local_password
+      - name: olduser
+        profile: user
+        state: absent
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+
+- name: Import the directory, resuming where the last attempt stopped
+  wallix_users:
+    users: "{{ directory_users }}"
+    checkpoint: /var/tmp/wallix_users.journal
+    api_url: "https://example.com"
+    wallix_user: admin
+    wallix_password: secret
+  async: 3600
+  poll: 30
+'''
+
+RETURN = r'''
+changed:
+  description: Whether anything was changed.
+  type: bool
+  returned: always
+users:
+  description: The outcome for each user, in the order of I(users).
+  type: list
+  elements: dict
+  returned: always
+  sample: [{"name": "jdoe", "changed": true, "msg": "User created."}]
+resumed:
+  description: Number of users taken from the I(checkpoint) journal of an interrupted run.
+  type: int
+  returned: when I(checkpoint) is set
+bastions:
+  description: With I(api_urls), the result on each bastion, with its C(api_url), in place of the results above.
+  type: list
+  elements: dict
+  returned: when I(api_urls) is set
+  sample: [{"api_url": "https://bastion-paris.example.com", "changed": true,
+            "users": [{"name": "jdoe", "changed": true, "msg": "User created."}]},
+           {"api_url": "https://bastion-dr.example.com", "changed": false, "failed": true,
+            "msg": "Request GET https://bastion-dr.example.com/api/users failed: timed out"}]
+'''
+
+def main():
+    argument_spec = wallix_argument_spec()
+    argument_spec.update(
+        users=dict(type='list', elements='dict', required=True, options=user_options()),
+        workers=dict(type='int', default=8),
+        page_size=dict(type='int', default=500),
+        checkpoint=dict(type='path', required=False),
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True
+    )
+
+    p = module.params
+    progress = AsyncProgress()
+
+    def run(client):
+        journal = open_journal(module, client, p['users'])
+        failed = None
+        try:
+            # Users already applied by an interrupted run are not listed again.
+            existing = {}
+            if not journal or any(journal.get(user['name']) is None for user in p['users']):
+                existing = list_users(client, page_size=p['page_size'])
+
+            def apply(user):
+                return reconcile_user(client, existing.get(user['name']), user, check_mode=module.check_mode)
+
+            results = []
+            failed = 0
+            outcomes = run_journaled(apply, p['users'], p['workers'], lambda user: user['name'], journal, progress)
+            for user, (result, error) in zip(p['users'], outcomes):
+                if error:
+                    failed += 1
+                    result = dict(name=user['name'], changed=False, failed=True, msg=error)
+                results.append(result)
+        finally:
+            if journal:
+                journal.close(remove=failed == 0)
+
+        changed = any(result['changed'] for result in results)
+        extra = dict(resumed=len(journal.done)) if journal else {}
+        if failed:
+            return dict(failed=True, msg=f"Failed to apply {failed} of {len(results)} users.", changed=changed,
+                        users=results, **extra)
+        return dict(changed=changed, users=results, **extra)
+
+    run_on_bastions(module, run, pool_size=max(p['pool_size'], p['workers']))
+
+if __name__ == '__main__':
+    main()